@@ -3,15 +3,49 @@ Core agent implementation for the Baby Manus agentic loop.
 This module contains the Agent class and event handling for streaming responses.
 """
 
-from typing import AsyncGenerator, List, Dict, Any, Union
-from openai import OpenAI
+from typing import AsyncGenerator, List, Dict, Any, Union, Deque
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
 from openai.types.chat import ChatCompletionMessageParam, ChatCompletionToolParam
-from tenacity import AsyncRetrying, stop_after_attempt, wait_fixed
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 from dataclasses import dataclass, field
-from pydantic import BaseModel
+from collections import deque
+from pydantic import BaseModel, ValidationError
+import asyncio
+import copy
+import functools
+import hashlib
 import json
+import os
 
-from clients import openai_client
+from clients import async_openai_client
+
+# Maximum number of tool calls from a single model turn that run at the same time
+TOOL_CONCURRENCY_LIMIT = int(os.getenv("TOOL_CONCURRENCY_LIMIT", "4"))
+
+# Number of most recent messages kept in an agent's conversation history
+MAX_CONTEXT_MESSAGES = int(os.getenv("MAX_CONTEXT_MESSAGES", "200"))
+
+# Retry policy for a model turn: only transient API failures are retried, with jittered
+# exponential backoff; JSON/tool errors fail fast. Copied per turn since retry state isn't shareable.
+_RETRYER = AsyncRetrying(
+    stop=stop_after_attempt(3),
+    wait=wait_random_exponential(multiplier=0.5, max=8),
+    retry=retry_if_exception_type((APIConnectionError, APITimeoutError, RateLimitError, InternalServerError)),
+    reraise=True,
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _tool_schema(tool_class: type[BaseModel]) -> ChatCompletionToolParam:
+    """Build the OpenAI function schema for a tool class (cached, schemas never change per class)."""
+    return {
+        "type": "function",
+        "function": {
+            "name": tool_class.__name__,
+            "description": tool_class.__doc__ or "",
+            "parameters": tool_class.model_json_schema(),
+        }
+    }
 
 
 # Event classes for streaming API
@@ -27,9 +61,15 @@ class EventText(AgentEvent):
 
 
 class EventInputJson(AgentEvent):
-    """Event for partial JSON input"""
-    def __init__(self, partial_json: str):
-        self.partial_json = partial_json
+    """Event for a chunk of tool-call JSON arguments.
+
+    Carries only the new delta (not the accumulated string) plus a monotonic
+    sequence number; consumers concatenate deltas per tool call index themselves.
+    """
+    def __init__(self, delta: str, seq: int, index: int):
+        self.delta = delta
+        self.seq = seq
+        self.index = index
 
 
 class EventToolUse(AgentEvent):
@@ -55,141 +95,268 @@ class Agent:
     system_prompt: str
     model: str
     tools: List[BaseModel]
-    messages: List[ChatCompletionMessageParam] = field(default_factory=list)
+    messages: Deque[ChatCompletionMessageParam] = field(default_factory=deque)
     available_tools: List[ChatCompletionToolParam] = field(default_factory=list)
 
     def __post_init__(self):
         # Convert tools to OpenAI format
-        self.available_tools = []
-        for tool_class in self.tools:
-            tool_schema = {
-                "type": "function",
-                "function": {
-                    "name": tool_class.__name__,
-                    "description": tool_class.__doc__ or "",
-                    "parameters": tool_class.model_json_schema(),
-                }
-            }
-            self.available_tools.append(tool_schema)
+        self.available_tools = [_tool_schema(tool_class) for tool_class in self.tools]
+        self._tool_by_name = {tool_class.__name__: tool_class for tool_class in self.tools}
+
+        # Keep history in a ring buffer so long sessions don't grow without bound
+        self.messages = deque(self.messages, maxlen=MAX_CONTEXT_MESSAGES)
+
+        # Resolve the system prompt prefix once instead of on every request
+        self._prefix: List[ChatCompletionMessageParam] = (
+            [{"role": "system", "content": self.system_prompt}] if self.system_prompt else []
+        )
+
+        # The system prompt and tool schemas form a byte-identical prefix on every request;
+        # keying requests on it lets OpenAI route them to the same prefix cache
+        prefix_bytes = json.dumps([self._prefix, self.available_tools], sort_keys=True).encode("utf-8")
+        self._prompt_cache_key = hashlib.sha256(prefix_bytes).hexdigest()[:32]
+
+    def _build_messages(self) -> List[ChatCompletionMessageParam]:
+        """Flatten the system prefix and history into the request message list."""
+        history = list(self.messages)
+        # Tool results whose assistant tool_calls message fell out of the buffer are rejected by the API
+        start = 0
+        while start < len(history) and history[start]["role"] == "tool":
+            start += 1
+        return self._prefix + history[start:]
 
     def add_user_message(self, message: str):
         """Add a user message to the conversation history."""
         self.messages.append({"role": "user", "content": message})
 
-    async def agentic_loop(self) -> AsyncGenerator[AgentEvent, None]:
+    def _clone(self) -> "Agent":
+        """Copy this agent with its own history, sharing the tool schemas and lookup table."""
+        clone = copy.copy(self)
+        clone.messages = deque(copy.deepcopy(list(self.messages)), maxlen=self.messages.maxlen)
+        return clone
+
+    async def run_batch_async(self, prompts: List[str], max_concurrency: int = 8) -> List[List[AgentEvent]]:
+        """
+        Run several independent prompts concurrently with this agent's configuration.
+        Each prompt runs on a clone of the agent so their conversations don't interleave;
+        returns the events of each run, in the same order as the prompts.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(prompt: str) -> List[AgentEvent]:
+            async with semaphore:
+                agent = self._clone()
+                agent.add_user_message(prompt)
+                return [event async for event in agent.agentic_loop()]
+
+        return await asyncio.gather(*(run_one(prompt) for prompt in prompts))
+
+    async def agentic_loop(self, emit_input_json: bool = True) -> AsyncGenerator[AgentEvent, None]:
         """
         Main agentic loop that streams responses from OpenAI and executes tools.
-        Supports recursive tool calling for multi-step reasoning.
+        Keeps calling the model until a turn produces no tool calls, for multi-step reasoning.
+        Consumers that don't display tool arguments as they stream can pass
+        emit_input_json=False to skip the per-delta EventInputJson events.
         """
-        if openai_client is None:
+        if async_openai_client is None:
             yield EventText(text="Error: OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.")
             return
 
-        async for attempt in AsyncRetrying(
-            stop=stop_after_attempt(3), wait=wait_fixed(3)
-        ):
-            with attempt:
-                # Prepare messages for OpenAI
-                openai_messages = []
-                if self.system_prompt:
-                    openai_messages.append({"role": "system", "content": self.system_prompt})
-                openai_messages.extend(self.messages)
-
-                # Create streaming request
-                stream = openai_client.chat.completions.create(
-                    model=self.model,
-                    messages=openai_messages,
-                    tools=self.available_tools,
-                    stream=True,
-                    max_tokens=8000,
-                )
-
-                accumulated_content = ""
-                accumulated_tool_calls = {}
-
-                for chunk in stream:
-                    delta = chunk.choices[0].delta
-
-                    # Handle text content
-                    if delta.content:
-                        accumulated_content += delta.content
-                        yield EventText(text=delta.content)
-
-                    # Handle tool calls
-                    if delta.tool_calls:
-                        for tool_call_delta in delta.tool_calls:
-                            index = tool_call_delta.index
-                            tool_call_id = tool_call_delta.id
-
-                            # Use index as the key since it's consistent across chunks
-                            key = f"index_{index}"
-
-                            if key not in accumulated_tool_calls:
-                                accumulated_tool_calls[key] = {
-                                    "id": tool_call_id or f"call_{index}",
-                                    "type": "function",
-                                    "function": {"name": "", "arguments": ""}
-                                }
-
-                            # Update the ID if we get it
-                            if tool_call_id:
-                                accumulated_tool_calls[key]["id"] = tool_call_id
-
-                            if tool_call_delta.function:
-                                if tool_call_delta.function.name:
-                                    accumulated_tool_calls[key]["function"]["name"] = tool_call_delta.function.name
-                                if tool_call_delta.function.arguments:
-                                    accumulated_tool_calls[key]["function"]["arguments"] += tool_call_delta.function.arguments
-
-                                # Yield partial JSON for function arguments
-                                yield EventInputJson(partial_json=accumulated_tool_calls[key]["function"]["arguments"])
-
-                # Execute tool calls if any
-                tool_calls_executed = False
-                if accumulated_tool_calls:
-                    for tool_call in accumulated_tool_calls.values():
-                        tool_name = tool_call["function"]["name"]
-                        tool_args_str = tool_call["function"]["arguments"]
-
-                        # Parse tool arguments with error handling
-                        try:
-                            tool_args = json.loads(tool_args_str)
-                        except json.JSONDecodeError as e:
-                            error_msg = f"Failed to parse tool arguments as JSON: {e}. Arguments: {tool_args_str}"
-                            yield EventText(text=f"Error: {error_msg}")
-                            # Clear accumulated tool calls to prevent infinite retry
-                            accumulated_tool_calls.clear()
-                            break
-
-                        # Find and execute the tool
-                        for tool_class in self.tools:
-                            if tool_class.__name__ == tool_name:
-                                # Create tool instance with arguments
-                                tool_instance = tool_class(**tool_args)
-
-                                # Execute tool
+        # Each iteration is one model turn; keep going while the model keeps calling tools
+        while True:
+            tool_calls_executed = False
+
+            # Prepare messages for OpenAI once per turn; retries reuse the same list
+            openai_messages = self._build_messages()
+
+            async for attempt in _RETRYER.copy():
+                with attempt:
+                    # Create streaming request
+                    stream = await async_openai_client.chat.completions.create(
+                        model=self.model,
+                        messages=openai_messages,
+                        tools=self.available_tools,
+                        stream=True,
+                        max_tokens=8000,
+                        extra_body={"prompt_cache_key": self._prompt_cache_key},
+                    )
+
+                    # Collect deltas in lists and join once, avoiding quadratic string concatenation
+                    content_parts: List[str] = []
+                    accumulated_tool_calls = {}
+                    tool_call_arguments: Dict[str, List[str]] = {}
+                    json_seq = 0
+
+                    async for chunk in stream:
+                        delta = chunk.choices[0].delta
+
+                        # Handle text content
+                        if delta.content:
+                            content_parts.append(delta.content)
+                            yield EventText(text=delta.content)
+
+                        # Handle tool calls
+                        if delta.tool_calls:
+                            for tool_call_delta in delta.tool_calls:
+                                index = tool_call_delta.index
+                                tool_call_id = tool_call_delta.id
+
+                                # Use index as the key since it's consistent across chunks
+                                key = f"index_{index}"
+
+                                if key not in accumulated_tool_calls:
+                                    accumulated_tool_calls[key] = {
+                                        "id": tool_call_id or f"call_{index}",
+                                        "type": "function",
+                                        "function": {"name": "", "arguments": ""}
+                                    }
+                                    tool_call_arguments[key] = []
+
+                                # Update the ID if we get it
+                                if tool_call_id:
+                                    accumulated_tool_calls[key]["id"] = tool_call_id
+
+                                if tool_call_delta.function:
+                                    if tool_call_delta.function.name:
+                                        accumulated_tool_calls[key]["function"]["name"] = tool_call_delta.function.name
+                                    if tool_call_delta.function.arguments:
+                                        tool_call_arguments[key].append(tool_call_delta.function.arguments)
+
+                                        # Yield only the new piece of the function arguments
+                                        if emit_input_json:
+                                            json_seq += 1
+                                            yield EventInputJson(delta=tool_call_delta.function.arguments, seq=json_seq, index=index)
+
+                    accumulated_content = "".join(content_parts)
+                    for key, tool_call in accumulated_tool_calls.items():
+                        tool_call["function"]["arguments"] = "".join(tool_call_arguments[key])
+
+                    # Execute tool calls if any
+                    if accumulated_tool_calls:
+                        # Parse arguments and instantiate every tool before running any of them
+                        pending_tools = []
+                        rejected_tools = []
+                        for key, tool_call in accumulated_tool_calls.items():
+                            tool_name = tool_call["function"]["name"]
+                            tool_args_str = tool_call["function"]["arguments"]
+
+                            # Parse tool arguments with error handling
+                            try:
+                                tool_args = json.loads(tool_args_str)
+                            except json.JSONDecodeError as e:
+                                error_msg = f"Failed to parse tool arguments as JSON: {e}. Arguments: {tool_args_str}"
+                                yield EventText(text=f"Error: {error_msg}")
+                                # Clear accumulated tool calls to prevent infinite retry
+                                accumulated_tool_calls.clear()
+                                pending_tools = []
+                                rejected_tools = []
+                                break
+
+                            # Find the tool and create an instance with arguments
+                            tool_class = self._tool_by_name.get(tool_name)
+                            if tool_class is None:
+                                # Report it back to the model instead of silently dropping the call
+                                error_msg = f"Unknown tool '{tool_name}'. Available tools: {', '.join(self._tool_by_name)}"
+                                yield EventText(text=f"Error: {error_msg}")
+                                rejected_tools.append((tool_call, error_msg))
+                                continue
+                            try:
+                                tool_instance = tool_class.model_validate(tool_args)
+                            except ValidationError as e:
+                                # Bad or non-object arguments are reported back the same way
+                                error_msg = f"Invalid arguments for tool '{tool_name}': {e}"
+                                yield EventText(text=f"Error: {error_msg}")
+                                rejected_tools.append((tool_call, error_msg))
+                                continue
+                            pending_tools.append((tool_call, tool_instance))
+
+                        if pending_tools or rejected_tools:
+                            for _, tool_instance in pending_tools:
                                 yield EventToolUse(tool=tool_instance)
-                                result = await tool_instance()
+
+                            # Run the tools concurrently, bounded so a large fan-out doesn't swamp Docker/HTTP
+                            semaphore = asyncio.Semaphore(TOOL_CONCURRENCY_LIMIT)
+
+                            async def run_tool(tool_instance):
+                                async with semaphore:
+                                    return await tool_instance()
+
+                            results = await asyncio.gather(
+                                *(run_tool(tool_instance) for _, tool_instance in pending_tools),
+                                return_exceptions=True,
+                            )
+
+                            # Add the assistant turn with all of its tool calls to the conversation
+                            self.messages.append({
+                                "role": "assistant",
+                                "content": accumulated_content,
+                                "tool_calls": [tool_call for tool_call, _ in pending_tools + rejected_tools]
+                            })
+
+                            for (tool_call, tool_instance), result in zip(pending_tools, results):
+                                if isinstance(result, BaseException):
+                                    result = f"Error executing tool {tool_call['function']['name']}: {result}"
 
                                 yield EventToolResult(tool=tool_instance, result=result)
 
                                 # Add tool result to conversation
                                 self.messages.append({
-                                    "role": "assistant",
-                                    "content": accumulated_content,
-                                    "tool_calls": [tool_call]
+                                    "role": "tool",
+                                    "tool_call_id": tool_call["id"],
+                                    "content": result
                                 })
 
+                            for tool_call, error_msg in rejected_tools:
                                 self.messages.append({
                                     "role": "tool",
                                     "tool_call_id": tool_call["id"],
-                                    "content": result
+                                    "content": f"Error: {error_msg}"
                                 })
 
-                                tool_calls_executed = True
-                                break
+                            tool_calls_executed = True
 
-                    # If we had tool calls and they were executed successfully, recursively continue the loop
-                    if tool_calls_executed:
-                        async for event in self.agentic_loop():
-                            yield event
\ No newline at end of file
+            # Stop once a turn finishes without executing any tools
+            if not tool_calls_executed:
+                break
+
+    async def agentic_loop_batched(
+        self, max_batch: int = 64, emit_input_json: bool = True
+    ) -> AsyncGenerator[List[AgentEvent], None]:
+        """
+        Run agentic_loop in a background task and yield its events in batches.
+        Whatever has queued up since the consumer last ran is delivered at once,
+        so a slow consumer wakes up once per batch instead of once per token.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+        done = object()
+
+        async def produce():
+            try:
+                async for event in self.agentic_loop(emit_input_json=emit_input_json):
+                    await queue.put(event)
+            except Exception as e:
+                # Hand the error to the consumer so it is raised where the events are read
+                await queue.put(e)
+                return
+            await queue.put(done)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                batch = []
+                item = await queue.get()
+                while item is not done and not isinstance(item, Exception):
+                    batch.append(item)
+                    if len(batch) >= max_batch or queue.empty():
+                        item = None
+                        break
+                    item = queue.get_nowait()
+
+                if batch:
+                    yield batch
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+        finally:
+            producer.cancel()
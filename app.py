@@ -1,9 +1,27 @@
+"""
+Web API exposing search and URL fetching for the agent.
+
+Run it under a production WSGI server rather than the Flask dev server, e.g.:
+
+    gunicorn -w 4 -k gthread --threads 8 -b 0.0.0.0:8888 app:app
+
+Rate limits are kept in memory by default, which is per worker process; set
+RATELIMIT_STORAGE_URI (e.g. redis://localhost:6379) to share them across workers.
+"""
+
+import os
 from flask import Flask, jsonify, request
 from flask_limiter import Limiter
-import requests
+from flask_limiter.util import get_remote_address
+from clients import http_session, HTTP_TIMEOUT
 
 app = Flask(__name__)  
-limiter = Limiter(app)
+limiter = Limiter(
+    key_func=get_remote_address,
+    app=app,
+    storage_uri=os.getenv("RATELIMIT_STORAGE_URI", "memory://"),
+    strategy="moving-window",
+)
 
 @app.route('/search', methods=['GET'])
 @limiter.limit('5 per minute')  # limit to 5 requests per minute
@@ -13,7 +31,11 @@ def search():
         return jsonify({'error': 'Query parameter is required.'}), 400
     # Use DuckDuckGo instant answer API (free and doesn't require API key)
     try:
-        response = requests.get(f'https://api.duckduckgo.com/?q={query}&format=json&no_html=1')
+        response = http_session.get(
+            'https://api.duckduckgo.com/',
+            params={'q': query, 'format': 'json', 'no_html': 1},
+            timeout=HTTP_TIMEOUT,
+        )
         return jsonify(response.json())
     except Exception as e:
         return jsonify({'error': f'Search failed: {str(e)}'}), 500
@@ -25,8 +47,5 @@ def open_url():
     if not url:
         return jsonify({'error': 'URL parameter is required.'}), 400
     # Replace with a call to an actual API or service
-    data = requests.get(url).text
-    return jsonify({'data': data})
-
-if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8888)
\ No newline at end of file
+    data = http_session.get(url, timeout=HTTP_TIMEOUT).text
+    return jsonify({'data': data})
\ No newline at end of file
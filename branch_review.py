@@ -15,55 +15,114 @@ The script will:
 4. Allow the user to approve/merge or reject the branch
 """
 
+import shlex
 import subprocess
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
+# Output of read-only git commands, reused while the branches stay unchanged
+_git_output_cache = {}
+
+# Runs detail queries in the background while the user reads the diff
+_prefetch_executor = ThreadPoolExecutor(max_workers=3)
+
+
 def run_git_command(command, cwd=None):
     """Run a git command and return the result."""
+    # Run git directly rather than through a shell
     try:
         result = subprocess.run(
-            command,
-            shell=True,
+            shlex.split(command),
             cwd=cwd,
             capture_output=True,
             text=True,
-            check=True
+            check=False
         )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
+    except OSError as e:
+        # e.g. git is not installed
         print(f"Error running command '{command}': {e}")
-        print(f"Error output: {e.stderr}")
         return None
+    if result.returncode != 0:
+        print(f"Error running command '{command}': exit status {result.returncode}\nError output: {result.stderr}")
+        return None
+    return result.stdout.strip()
+
+
+def run_git_command_stream(command, cwd=None):
+    """Run a git command and yield its output line by line as it is produced."""
+    try:
+        process = subprocess.Popen(
+            shlex.split(command),
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+    except OSError as e:
+        print(f"Error running command '{command}': {e}")
+        return
+    with process:
+        # Drain stderr alongside stdout so git never blocks on a full stderr pipe
+        stderr_parts = []
+        stderr_reader = threading.Thread(target=lambda: stderr_parts.append(process.stderr.read()), daemon=True)
+        stderr_reader.start()
+        yield from process.stdout
+        stderr_reader.join()
+        stderr = "".join(stderr_parts)
+    if process.returncode != 0:
+        print(f"Error running command '{command}': exit status {process.returncode}\nError output: {stderr}")
+
+
+def run_cached_git_command(command):
+    """Run a read-only git command, reusing its output from earlier in this session."""
+    if command not in _git_output_cache:
+        _git_output_cache[command] = run_git_command(command)
+    return _git_output_cache[command]
+
+
+def get_current_branch():
+    """Get the name of the checked-out branch."""
+    return run_git_command("git rev-parse --abbrev-ref HEAD")
 
 
 def get_branches():
     """Get all branches except the current one."""
     branches_output = run_git_command("git branch -a")
     if not branches_output:
-        return []
+        return [], None
 
+    # One pass over the lines; the current branch is the one marked with '* '
     branches = []
     current_branch = None
-
-    for line in branches_output.split('\n'):
-        line = line.strip()
+    for line in branches_output.splitlines():
         if line.startswith('*'):
             current_branch = line[2:].strip()
         else:
-            branches.append(line)
+            branches.append(line.strip())
 
     return branches, current_branch
 
 
+def prefetch_branch_details(branch_name):
+    """Start the 'more details' git queries in the background and return their futures."""
+    return {
+        "stat": _prefetch_executor.submit(run_cached_git_command, f"git diff --stat main..{branch_name}"),
+        "files": _prefetch_executor.submit(run_cached_git_command, f"git diff --name-only main..{branch_name}"),
+        "status": _prefetch_executor.submit(run_git_command, f"git status {branch_name} --porcelain"),
+    }
+
+
 def show_branch_changes(branch_name):
     """Show the changes in a specific branch compared to main."""
     print(f"\n=== Changes in branch '{branch_name}' ===")
 
     # Show commit log for the branch
     print("\nCommits in this branch:")
-    log_output = run_git_command(f"git log --oneline main..{branch_name}")
+    log_output = run_cached_git_command(f"git log --oneline main..{branch_name}")
     if log_output and len(log_output) > 0:
         print(log_output)
     else:
@@ -71,10 +130,12 @@ def show_branch_changes(branch_name):
 
     # Show diff
     print(f"\nDiff from main to {branch_name}:")
-    diff_output = run_git_command(f"git diff main..{branch_name}")
-    if diff_output and len(diff_output) > 0:
-        print(diff_output)
-    else:
+    # Stream the diff so large branches start printing immediately
+    has_changes = False
+    for line in run_git_command_stream(f"git diff main..{branch_name}"):
+        print(line, end="")
+        has_changes = True
+    if not has_changes:
         print("(No changes found in this branch compared to main.)")
 
 
@@ -131,14 +192,14 @@ def main():
         sys.exit(1)
 
     # Get current branch
-    current_branch = run_git_command("git rev-parse --abbrev-ref HEAD")
+    current_branch = get_current_branch()
     if not current_branch:
         print("Error: Could not determine current branch")
         sys.exit(1)
 
     print(f"Current branch: {current_branch}")
 
-    # Get all branches
+    # Get all branches once; going back to the list reuses them
     branches, _ = get_branches()
     if not branches:
         print("No other branches found.")
@@ -146,71 +207,79 @@ def main():
         print("Run this tool again after the agent has created some branches.")
         return
 
-    print(f"\nAvailable branches ({len(branches)}):")
-    for i, branch in enumerate(branches, 1):
-        print(f"  {i}. {branch}")
-
-    # Branch selection
     while True:
-        try:
-            choice = input("\nSelect a branch to review (number or 'q' to quit): ").strip()
-            if choice.lower() == 'q':
+        print(f"\nAvailable branches ({len(branches)}):")
+        for i, branch in enumerate(branches, 1):
+            print(f"  {i}. {branch}")
+
+        # Branch selection
+        while True:
+            try:
+                choice = input("\nSelect a branch to review (number or 'q' to quit): ").strip()
+                if choice.lower() == 'q':
+                    return
+
+                branch_index = int(choice) - 1
+                if 0 <= branch_index < len(branches):
+                    selected_branch = branches[branch_index]
+                    break
+                else:
+                    print(f"Please enter a number between 1 and {len(branches)}")
+            except ValueError:
+                print("Please enter a valid number or 'q' to quit")
+
+        # Show branch changes, fetching the details view in parallel
+        details = prefetch_branch_details(selected_branch)
+        show_branch_changes(selected_branch)
+
+        # Decision prompt
+        while True:
+            decision = input(f"\nWhat would you like to do with branch '{selected_branch}'?\n"
+                            "  1. Merge into main\n"
+                            "  2. Reject (delete branch)\n"
+                            "  3. Show more details\n"
+                            "  4. Back to branch list\n"
+                            "Choice: ").strip()
+
+            if decision == '1':
+                if merge_branch(selected_branch):
+                    print("Branch merged successfully!")
+                else:
+                    print("Merge failed")
                 return
-
-            branch_index = int(choice) - 1
-            if 0 <= branch_index < len(branches):
-                selected_branch = branches[branch_index]
+            elif decision == '2':
+                if reject_branch(selected_branch):
+                    print("Branch rejected and deleted")
+                return
+            elif decision == '3':
+                # Show more details
+                print("\n=== Additional Details ===")
+                print("\nDiff summary:")
+                stat_output = details["stat"].result()
+                if stat_output:
+                    print(stat_output)
+                else:
+                    print("(No changes)")
+
+                print("\nFiles changed:")
+                files_output = details["files"].result()
+                if files_output:
+                    print(files_output)
+                else:
+                    print("(No files changed)")
+
+                print("\nBranch status:")
+                status_output = details["status"].result()
+                if status_output:
+                    print(status_output)
+                else:
+                    print("(Branch is clean)")
+
+            elif decision == '4':
+                # Back to branch list
                 break
             else:
-                print(f"Please enter a number between 1 and {len(branches)}")
-        except ValueError:
-            print("Please enter a valid number or 'q' to quit")
-
-    # Show branch changes
-    show_branch_changes(selected_branch)
-
-    # Decision prompt
-    while True:
-        decision = input(f"\nWhat would you like to do with branch '{selected_branch}'?\n"
-                        "  1. Merge into main\n"
-                        "  2. Reject (delete branch)\n"
-                        "  3. Show more details\n"
-                        "  4. Back to branch list\n"
-                        "Choice: ").strip()
-
-        if decision == '1':
-            if merge_branch(selected_branch):
-                print("Branch merged successfully!")
-            else:
-                print("Merge failed")
-            break
-        elif decision == '2':
-            if reject_branch(selected_branch):
-                print("Branch rejected and deleted")
-            break
-        elif decision == '3':
-            # Show more details
-            print("\n=== Additional Details ===")
-            print("\nFiles changed:")
-            files_output = run_git_command(f"git diff --name-only main..{selected_branch}")
-            if files_output:
-                print(files_output)
-            else:
-                print("(No files changed)")
-
-            print("\nBranch status:")
-            status_output = run_git_command(f"git status {selected_branch} --porcelain")
-            if status_output:
-                print(status_output)
-            else:
-                print("(Branch is clean)")
-
-        elif decision == '4':
-            # Back to branch list
-            main()
-            return
-        else:
-            print("Invalid choice. Please enter 1, 2, 3, or 4.")
+                print("Invalid choice. Please enter 1, 2, 3, or 4.")
 
 
 if __name__ == "__main__":
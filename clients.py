@@ -1,35 +1,81 @@
 """
 Client initialization for external services.
-This module provides clients for OpenAI API and Docker daemon.
+This module provides clients for OpenAI API, Docker daemon and outbound HTTP.
 """
 
+import functools
 import os
-from openai import OpenAI
+from typing import Optional
+import httpx
+from openai import OpenAI, AsyncOpenAI
 import docker
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
 
+# HTTP/2 with a keep-alive pool lets concurrent completions (parallel tools, subagents) share connections
+OPENAI_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=300)
+OPENAI_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
 # OpenAI client initialization
 api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
     print("Warning: OPENAI_API_KEY environment variable not set. Please set it to use the agent.")
     openai_client = None
+    async_openai_client = None
 else:
-    openai_client = OpenAI(api_key=api_key)
-
-# Docker client initialization
-try:
-    docker_client = docker.from_env()
-    # Test that Docker is actually accessible
-    docker_client.ping()
-    print("Docker client initialized successfully.")
-except docker.errors.DockerException as e:
-    print(f"Warning: Docker daemon not accessible: {e}")
-    print("Please ensure Docker Desktop is running and try again.")
-    docker_client = None
-except Exception as e:
-    print(f"Warning: Docker client initialization failed: {e}")
-    print("Docker-based tools will not be available.")
-    print("Try: 1) Start Docker Desktop, 2) Restart this application")
-    docker_client = None
+    openai_client = OpenAI(
+        api_key=api_key,
+        http_client=httpx.Client(http2=True, limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_HTTP_TIMEOUT),
+    )
+    # Async client for the agentic loop so streaming doesn't block the event loop
+    async_openai_client = AsyncOpenAI(
+        api_key=api_key,
+        http_client=httpx.AsyncClient(http2=True, limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_HTTP_TIMEOUT),
+    )
+
+
+async def prewarm_openai_client():
+    """Open a connection to the OpenAI API ahead of the first completion so it skips the TLS handshake."""
+    if async_openai_client is None:
+        return
+    try:
+        await async_openai_client.models.list()
+    except Exception:
+        # Warm-up is best effort; the real request will surface any problem
+        pass
+
+# Docker client initialization is deferred until a Docker tool needs it,
+# so importing this module doesn't pay for a round-trip to the daemon
+@functools.cache
+def get_docker_client() -> Optional[docker.DockerClient]:
+    """Return the shared Docker client, connecting on first use (None if Docker is unavailable)."""
+    try:
+        docker_client = docker.from_env()
+        # Test that Docker is actually accessible
+        docker_client.ping()
+        print("Docker client initialized successfully.")
+        return docker_client
+    except docker.errors.DockerException as e:
+        print(f"Warning: Docker daemon not accessible: {e}")
+        print("Please ensure Docker Desktop is running and try again.")
+        return None
+    except Exception as e:
+        print(f"Warning: Docker client initialization failed: {e}")
+        print("Docker-based tools will not be available.")
+        print("Try: 1) Start Docker Desktop, 2) Restart this application")
+        return None
+
+# Shared HTTP session so GitHub/web calls reuse pooled keep-alive connections
+HTTP_TIMEOUT = (3, 10)  # (connect, read) seconds
+http_session = requests.Session()
+_http_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+)
+http_session.mount("https://", _http_adapter)
+http_session.mount("http://", _http_adapter)
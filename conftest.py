@@ -0,0 +1,20 @@
+"""
+Shared pytest configuration.
+Async tests run on uvloop when it is installed (asyncio_mode = auto is set in pytest.ini).
+"""
+
+import pytest
+
+# Import the tool module (and through it openai, docker and pydantic) once when the session
+# starts; test modules then get it from sys.modules, and an import error fails fast here
+import tools  # noqa: F401
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_asyncio_loop_factories(config, item):
+    """Create async test event loops with uvloop when it is available."""
+    try:
+        import uvloop
+    except ImportError:
+        return None
+    return {"uvloop": uvloop.new_event_loop}
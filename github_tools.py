@@ -1,19 +1,20 @@
-import requests
+from clients import http_session, HTTP_TIMEOUT
 
 class GitHubTools:
     def __init__(self, token, repo):
         self.headers = {'Authorization': f'token {token}'}
         self.repo = repo
+        self.session = http_session
 
     def create_pr(self, title, body, base='main', head='feature-branch'):
         url = f'https://api.github.com/repos/{self.repo}/pulls'
         data = {'title': title, 'body': body, 'base': base, 'head': head}
-        response = requests.post(url, headers=self.headers, json=data)
+        response = self.session.post(url, headers=self.headers, json=data, timeout=HTTP_TIMEOUT)
         return response.json()
 
     def list_issues(self):
         url = f'https://api.github.com/repos/{self.repo}/issues'
-        response = requests.get(url, headers=self.headers)
+        response = self.session.get(url, headers=self.headers, timeout=HTTP_TIMEOUT)
         return response.json()
 
     def update_issue(self, issue_number, title=None, body=None):
@@ -23,10 +24,10 @@ class GitHubTools:
             data['title'] = title
         if body:
             data['body'] = body
-        response = requests.patch(url, headers=self.headers, json=data)
+        response = self.session.patch(url, headers=self.headers, json=data, timeout=HTTP_TIMEOUT)
         return response.json()
 
     def delete_issue(self, issue_number):
         url = f'https://api.github.com/repos/{self.repo}/issues/{issue_number}'
-        response = requests.delete(url, headers=self.headers)
+        response = self.session.delete(url, headers=self.headers, timeout=HTTP_TIMEOUT)
         return response.status_code
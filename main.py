@@ -7,7 +7,7 @@ import asyncio
 import sys
 import traceback
 from dotenv import load_dotenv
-from simple_ui import main as ui_main
+from simple_ui import main as ui_main, install_uvloop
 
 
 def global_exception_handler(exc_type, exc_value, exc_traceback):
@@ -40,6 +40,14 @@ if __name__ == "__main__":
     # Load env vars
     load_dotenv()
 
+    # Characters the console can't encode are printed as '?' instead of raising
+    for stream in (sys.stdout, sys.stderr):
+        if hasattr(stream, "reconfigure"):
+            stream.reconfigure(errors="replace")
+
+    # Prefer uvloop for the asyncio event loop when installed
+    install_uvloop()
+
     # Run the terminal UI with graceful error handling for Windows asyncio cleanup
     try:
         asyncio.run(ui_main())
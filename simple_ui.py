@@ -4,30 +4,118 @@ Handles user input and displays agent responses with streaming.
 """
 
 import asyncio
-from typing import Callable, Awaitable
-from agent import Agent, EventText, EventInputJson, EventToolUse, EventToolResult
-from tools import (
-    ToolRunCommandInDevContainer,
-    ToolUpsertFile,
-    ToolReadFile,
-    ToolListDirectory,
-    ToolSearchFiles,
-    ToolGitStatus,
-    ToolGitBranch,
-    ToolGitCreateBranch,
-    ToolGitAddFiles,
-    ToolGitCommit,
-    ToolGitPushBranch,
-    ToolEditFile,
-    ToolSearchAndReplace,
-    ToolTmuxCommand,
-    ToolCurlCommand,
-    ToolSpawnSubagent,
-    create_tool_interact_with_user,
-    start_python_dev_container,
-    configure_git,
-    handle_slash_command
-)
+import functools
+import os
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Awaitable
+
+from simple_ui_prompts import CODING_ASSISTANT_PROMPT
+from utils import truncate
+
+# Agent, tools and clients pull in openai/docker, so they're imported where first needed
+if TYPE_CHECKING:
+    from tools import Tool
+
+
+async def ainput(prompt: str = "") -> str:
+    """Read a line from the terminal without blocking the event loop.
+
+    input() runs on a daemon thread so an abandoned read (e.g. after Ctrl+C) never
+    holds up interpreter shutdown the way a default-executor thread would.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve(result=None, error=None):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def read():
+        try:
+            line = input(prompt)
+        except BaseException as e:
+            loop.call_soon_threadsafe(resolve, None, e)
+        else:
+            loop.call_soon_threadsafe(resolve, line)
+
+    threading.Thread(target=read, daemon=True).start()
+    return await future
+
+
+# Docker probes are round-trips to the daemon; reuse answers for a couple of seconds
+DOCKER_STATUS_TTL = 2.0
+_docker_status_cache: dict[str, tuple[float, Any]] = {}
+
+
+def _cached_docker_probe(key: str, probe: Callable[[], Any]) -> Any:
+    """Return a recent result of a Docker probe, running it again once the TTL has passed."""
+    cached = _docker_status_cache.get(key)
+    now = time.monotonic()
+    if cached is not None and now - cached[0] < DOCKER_STATUS_TTL:
+        return cached[1]
+    result = probe()
+    _docker_status_cache[key] = (now, result)
+    return result
+
+
+@functools.cache
+def _static_tools() -> "tuple[type[Tool], ...]":
+    """Tools shared by every agent (the user-interaction tool is added per UI)."""
+    from tools import (
+        ToolRunCommandInDevContainer,
+        ToolUpsertFile,
+        ToolReadFile,
+        ToolListDirectory,
+        ToolSearchFiles,
+        ToolGitStatus,
+        ToolGitBranch,
+        ToolGitCreateBranch,
+        ToolGitAddFiles,
+        ToolGitCommit,
+        ToolGitPushBranch,
+        ToolEditFile,
+        ToolSearchAndReplace,
+        ToolTmuxCommand,
+        ToolCurlCommand,
+        ToolSpawnSubagent,
+    )
+    return (
+        ToolRunCommandInDevContainer,
+        ToolUpsertFile,
+        ToolReadFile,
+        ToolListDirectory,
+        ToolSearchFiles,
+        ToolGitStatus,
+        ToolGitBranch,
+        ToolGitCreateBranch,
+        ToolGitAddFiles,
+        ToolGitCommit,
+        ToolGitPushBranch,
+        ToolEditFile,
+        ToolSearchAndReplace,
+        ToolTmuxCommand,
+        ToolCurlCommand,
+        ToolSpawnSubagent,
+    )
+
+
+# Streamed text is flushed to the terminal once this many characters or seconds have accumulated
+OUTPUT_FLUSH_CHARS = 512
+OUTPUT_FLUSH_INTERVAL = 0.016
+
+# Labels for the field a tool names in its _primary_repr class attribute
+_PRIMARY_REPR_LABELS = {'command': 'Command', 'file_path': 'File'}
+
+# REPL keywords handled locally, checked against the lowercased input
+_QUIT_CMDS = frozenset({'quit', 'exit', 'q'})
+_STATUS_CMDS = frozenset({'status', 'docker status', 'check docker'})
+_HELP_CMDS = frozenset({'/help', '/commands'})
 
 
 class SimpleUI:
@@ -35,17 +123,46 @@ class SimpleUI:
 
     def __init__(self):
         self.agent = None
+        self._buffered_chars = 0
+        self._last_flush = time.monotonic()
+
+        # Streamed text goes to the byte buffer underneath stdout, skipping the text layer's
+        # per-call locking and newline translation; Windows consoles keep the text path
+        self._out_buffer = getattr(sys.stdout, "buffer", None) if os.name != "nt" else None
+        self._out_encoding = sys.stdout.encoding or "utf-8"
+
+    def _write(self, text: str):
+        """Write streamed text, flushing in blocks rather than once per token."""
+        if self._out_buffer is not None:
+            self._out_buffer.write(text.encode(self._out_encoding, "replace"))
+        else:
+            sys.stdout.write(text)
+        self._buffered_chars += len(text)
+        if (self._buffered_chars >= OUTPUT_FLUSH_CHARS
+                or time.monotonic() - self._last_flush >= OUTPUT_FLUSH_INTERVAL):
+            self._flush()
+
+    def _flush(self):
+        """Flush any buffered streamed text to the terminal."""
+        sys.stdout.flush()
+        self._buffered_chars = 0
+        self._last_flush = time.monotonic()
 
     async def prompt_user(self, query: str) -> str:
         """Prompt the user for input in the terminal."""
         print(f"\n🤔 {query}")
-        return input("> ").strip()
+        return (await ainput("> ")).strip()
 
     def initialize_agent(self, model: str = "gpt-4o-mini"):
-        """Initialize the agent with tools."""
+        """Initialize the agent with tools. Does nothing if an agent already exists."""
+        if self.agent is not None:
+            return
+
+        from agent import Agent
+        from tools import check_docker_availability, start_python_dev_container, create_tool_interact_with_user
+
         # Check Docker availability first
-        from tools import check_docker_availability
-        docker_available, docker_message = check_docker_availability()
+        docker_available, docker_message = _cached_docker_probe("availability", check_docker_availability)
         if not docker_available:
             print(f"[WARN] {docker_message}")
             print("   Docker-based tools will not be available.")
@@ -53,109 +170,40 @@ class SimpleUI:
         else:
             # Start the Python dev container
             container_started = start_python_dev_container("python-dev")
+            # The container was just (re)created, so earlier status answers are stale
+            _docker_status_cache.clear()
             if not container_started:
                 print("[WARN] Docker container failed to start. Docker tools may not work.")
                 print("   Make sure Docker is running and you have the python:3.12 image.")
 
         # Create tools
-        tools = [
-            ToolRunCommandInDevContainer,
-            ToolUpsertFile,
-            ToolReadFile,
-            ToolListDirectory,
-            ToolSearchFiles,
-            ToolGitStatus,
-            ToolGitBranch,
-            ToolGitCreateBranch,
-            ToolGitAddFiles,
-            ToolGitCommit,
-            ToolGitPushBranch,
-            ToolEditFile,
-            ToolSearchAndReplace,
-            ToolTmuxCommand,
-            ToolCurlCommand,
-            ToolSpawnSubagent,
-            create_tool_interact_with_user(self.prompt_user)
-        ]
-
-        # System prompt for coding tasks with branch-based workflow
-        system_prompt = """
-You are a helpful AI coding assistant that works within a containerized development environment with git branch management.
-
-You have access to tools that allow you to:
-1. Run commands in a Python development container (ToolRunCommandInDevContainer)
-2. **FILE EDITING TOOLS - USE CORRECTLY:**
-   - ToolUpsertFile: ONLY for creating new files or completely replacing file content
-   - ToolEditFile: For appending content to existing files (like adding new tools to tools.py)
-   - ToolSearchAndReplace: For modifying specific sections within existing files
-3. Read files from the host filesystem to understand your codebase (ToolReadFile)
-4. List directory contents on the host filesystem (ToolListDirectory)
-5. Search for text patterns across files in your codebase (ToolSearchFiles)
-6. Execute curl commands for testing APIs and making HTTP requests (ToolCurlCommand)
-7. Check git status (ToolGitStatus)
-8. View and manage git branches (ToolGitBranch)
-9. Create new feature branches (ToolGitCreateBranch)
-10. Stage files for commit (ToolGitAddFiles)
-11. Commit changes (ToolGitCommit)
-12. Push branches to remote (ToolGitPushBranch)
-13. Spawn subagents for complex tasks (ToolSpawnSubagent)
-14. Ask the user for clarification when needed
-
-BRANCH-BASED WORKFLOW:
-- For any coding task, create a new feature branch using ToolGitCreateBranch
-- Use descriptive branch names like "feature/add-user-auth" or "bugfix/fix-login-validation"
-- Make your changes and test them within the container
-- Stage and commit your changes with clear, descriptive commit messages
-- Push the branch when ready for host review
-- The host will review and merge approved branches manually
-
-IMPORTANT GUIDELINES:
-- Always use the tools to test and run code - do not just describe what code would do
-- When creating files, use relative paths from the container's /app directory (which is mounted to the project root)
-- You can now read your own source code to understand your capabilities and plan extensions
-- Use ToolReadFile to examine your own code and understand how to modify yourself
-- Use ToolSearchFiles to find specific functions, classes, or patterns in the codebase
-- **CRITICAL FILE EDITING RULES:**
-  - To add new tools to tools.py: Use ToolEditFile to append to the end of the file
-  - To remove/modify existing tools: Use ToolSearchAndReplace to target specific content
-  - NEVER use ToolUpsertFile on tools.py - it will overwrite everything!
-  - ToolUpsertFile should only be used for creating brand new files
-- **SPAWN SUBAGENT USAGE:**
-  - Use ToolSpawnSubagent for complex, multi-step tasks that would clutter your main context
-  - Subagents work independently with their own focused prompt and can use all available tools
-  - Useful for: code refactoring, complex debugging, multi-file changes, research tasks
-  - Keep subagent tasks specific and focused for best results
-- Always create feature branches for changes - never work directly on main
-- If a tool fails, analyze the error message and try a different approach
-- For complex tasks, break them down into smaller steps
-- Use simple, working code rather than complex solutions
-- If Docker tools are not available, inform the user and suggest alternatives
-
-WORKFLOW:
-1. Read and understand your current codebase using ToolReadFile and ToolSearchFiles
-2. **For modifying your own code (like tools.py):**
-   - Use ToolEditFile to append new tools/functions to existing files
-   - Use ToolSearchAndReplace to modify or remove specific sections
-   - NEVER use ToolUpsertFile on existing files - it overwrites everything!
-3. Create new files using ToolUpsertFile
-4. Test code using ToolRunCommandInDevContainer
-5. Iterate based on results
-6. Ask for clarification if requirements are unclear
-
-Always be helpful and provide clear explanations of what you're doing.
-"""
+        tools = list(_static_tools()) + [create_tool_interact_with_user(self.prompt_user)]
+
 
         self.agent = Agent(
-            system_prompt=system_prompt,
+            system_prompt=CODING_ASSISTANT_PROMPT,
             model=model,
             tools=tools,
             messages=[]
         )
 
+    # These print through the text layer, so they flush before streamed bytes resume
+    def _on_tool_use(self, tool: "Tool"):
+        self._flush()
+        print(f"\n[TOOL] Using tool: {tool.__class__.__name__}", flush=True)
+        attr = tool._primary_repr
+        if attr is not None:
+            print(f"   {_PRIMARY_REPR_LABELS[attr]}: {getattr(tool, attr)}", flush=True)
+
+    def _on_tool_result(self, result: str):
+        self._flush()
+        print(f"[RESULT] Tool result: {truncate(result)}", flush=True)
+
     async def run_interaction(self, user_input: str):
         """Run a single interaction with the agent."""
-        if not self.agent:
-            self.initialize_agent()
+        from agent import EventText, EventToolUse, EventToolResult
+
+        self.initialize_agent()
 
         # Add user message
         self.agent.add_user_message(user_input)
@@ -164,21 +212,21 @@ Always be helpful and provide clear explanations of what you're doing.
         print("\nAgent:", end=" ", flush=True)
 
         
-        async for event in self.agent.agentic_loop():
-            if isinstance(event, EventText):
-                print(event.text, end="", flush=True)
-            elif isinstance(event, EventInputJson):
-                # Could show partial JSON if needed
-                pass
-            elif isinstance(event, EventToolUse):
-                print(f"\n[TOOL] Using tool: {event.tool.__class__.__name__}")
-                if hasattr(event.tool, 'command'):
-                    print(f"   Command: {event.tool.command}")
-                elif hasattr(event.tool, 'file_path'):
-                    print(f"   File: {event.tool.file_path}")
-            elif isinstance(event, EventToolResult):
-                print(f"[RESULT] Tool result: {event.result[:100]}{'...' if len(event.result) > 100 else ''}")
-
+        # The agent streams into a bounded queue from its own task, so reading the
+        # response keeps going while the terminal is being written to
+        async for batch in self.agent.agentic_loop_batched(emit_input_json=False):
+            for event in batch:
+                # Text deltas dominate the stream, so they're matched first; argument
+                # deltas aren't displayed, so the agent doesn't emit them for the UI
+                match event:
+                    case EventText(text=text):
+                        self._write(text)
+                    case EventToolUse(tool=tool):
+                        self._on_tool_use(tool)
+                    case EventToolResult(result=result):
+                        self._on_tool_result(result)
+
+        self._flush()
         print("\n")
 
     async def run(self):
@@ -187,31 +235,33 @@ Always be helpful and provide clear explanations of what you're doing.
         print("Type your requests and I'll help you with coding tasks.")
         print("Commands: 'status' to check Docker, 'quit' or 'exit' to stop.\n")
 
-        if not self.agent:
-            self.initialize_agent()
+        self.initialize_agent()
 
         while True:
             try:
-                user_input = input("You: ").strip()
+                user_input = (await ainput("You: ")).strip()
+                lowered = user_input.lower()
 
-                if user_input.lower() in ['quit', 'exit', 'q']:
+                if lowered in _QUIT_CMDS:
                     print("Goodbye!")
                     break
 
                 # Handle slash commands directly without invoking the LLM
                 if user_input.startswith('/'):
-                    from tools import list_slash_commands
+                    from tools import handle_slash_command
                     result = handle_slash_command(user_input)
                     # For help, show full command list
-                    if user_input.strip() in ['/help', '/commands']:
+                    if user_input in _HELP_CMDS:
                         print(result)
                     else:
                         print(f"[COMMAND] {result}")
                     continue
 
-                if user_input.lower() in ['status', 'docker status', 'check docker']:
+                if lowered in _STATUS_CMDS:
                     from tools import check_container_status
-                    status = check_container_status("python-dev")
+                    status = _cached_docker_probe(
+                        "status:python-dev", lambda: check_container_status("python-dev")
+                    )
                     print(f"[STATUS] Docker Status: {status}")
                     continue
 
@@ -231,11 +281,37 @@ Always be helpful and provide clear explanations of what you're doing.
                 continue
 
 
+def install_uvloop():
+    """Use uvloop's faster event loop when it is available (not on Windows)."""
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
 async def main():
     """Main entry point for the UI."""
+    from clients import prewarm_openai_client
+
+    # Let new tasks (subagents, stream producers) run inline until they first suspend,
+    # skipping a scheduling hop; eager_task_factory exists from Python 3.12
+    eager_task_factory = getattr(asyncio, "eager_task_factory", None)
+    if eager_task_factory is not None:
+        asyncio.get_running_loop().set_task_factory(eager_task_factory)
+
+    # Warm up the OpenAI connection while the user types their first request
+    prewarm_task = asyncio.create_task(prewarm_openai_client())
     ui = SimpleUI()
-    await ui.run()
+    try:
+        await ui.run()
+    finally:
+        prewarm_task.cancel()
+        # Stop background subagents so their output is flushed before the loop closes
+        if "tools" in sys.modules:
+            await sys.modules["tools"].shutdown_subagents()
 
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
@@ -0,0 +1,176 @@
+"""
+Agent loop tests against a fake AsyncOpenAI client that replays scripted streams.
+"""
+
+import asyncio
+import json
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+from pydantic import BaseModel
+
+import agent
+from agent import Agent, EventText, EventToolResult, EventToolUse
+
+
+def _chunk(content=None, tool_calls=None):
+    """Build one streamed chunk; tool_calls holds (index, id, name, arguments) tuples."""
+    deltas = None
+    if tool_calls:
+        deltas = [
+            SimpleNamespace(index=index, id=call_id, function=SimpleNamespace(name=name, arguments=arguments))
+            for index, call_id, name, arguments in tool_calls
+        ]
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content, tool_calls=deltas))])
+
+
+class FakeAsyncOpenAI:
+    """Replays one list of chunks per chat.completions.create call and records the requests."""
+
+    def __init__(self, turns):
+        self.turns = list(turns)
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        self.requests.append(kwargs)
+        chunks = self.turns.pop(0)
+
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        return stream()
+
+
+finished = []
+
+
+class ToolSlow(BaseModel):
+    """Finishes after ToolFast even though it is called first."""
+
+    value: int
+
+    async def __call__(self) -> str:
+        await asyncio.sleep(0.05)
+        finished.append("slow")
+        return f"slow {self.value}"
+
+
+class ToolFast(BaseModel):
+    """Finishes right away."""
+
+    value: int
+
+    async def __call__(self) -> str:
+        finished.append("fast")
+        return f"fast {self.value}"
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    def install(*turns):
+        client = FakeAsyncOpenAI(turns)
+        monkeypatch.setattr(agent, "async_openai_client", client)
+        return client
+
+    finished.clear()
+    return install
+
+
+async def _run(test_agent):
+    return [event async for event in test_agent.agentic_loop(emit_input_json=False)]
+
+
+def _tool_messages(test_agent):
+    return [(m["tool_call_id"], m["content"]) for m in test_agent.messages if m["role"] == "tool"]
+
+
+async def test_concurrent_tool_results_keep_call_order(fake_client):
+    client = fake_client(
+        [
+            _chunk(tool_calls=[(0, "call_slow", "ToolSlow", '{"value"')]),
+            _chunk(tool_calls=[(0, None, None, ": 1}"), (1, "call_fast", "ToolFast", '{"value": 2}')]),
+        ],
+        [_chunk(content="done")],
+    )
+    test_agent = Agent(system_prompt="system", model="test", tools=[ToolSlow, ToolFast])
+    test_agent.add_user_message("go")
+
+    events = await _run(test_agent)
+
+    # Both tools ran at once, yet results are reported in the order they were called
+    assert finished == ["fast", "slow"]
+    assert [e.result for e in events if isinstance(e, EventToolResult)] == ["slow 1", "fast 2"]
+    assert _tool_messages(test_agent) == [("call_slow", "slow 1"), ("call_fast", "fast 2")]
+    assert isinstance(events[-1], EventText) and events[-1].text == "done"
+
+    # The second turn sends the assistant tool calls followed by their results
+    sent = client.requests[1]["messages"]
+    assert [m["role"] for m in sent] == ["system", "user", "assistant", "tool", "tool"]
+    assert json.loads(sent[2]["tool_calls"][0]["function"]["arguments"]) == {"value": 1}
+
+
+async def test_unknown_tool_is_reported_to_the_model(fake_client):
+    fake_client(
+        [_chunk(tool_calls=[(0, "call_missing", "ToolMissing", "{}"), (1, "call_fast", "ToolFast", '{"value": 3}')])],
+        [_chunk(content="ok")],
+    )
+    test_agent = Agent(system_prompt="system", model="test", tools=[ToolFast])
+    test_agent.add_user_message("go")
+
+    events = await _run(test_agent)
+
+    assert any(isinstance(e, EventText) and "Unknown tool 'ToolMissing'" in e.text for e in events)
+    assert [e.tool.value for e in events if isinstance(e, EventToolUse)] == [3]
+    messages = dict(_tool_messages(test_agent))
+    assert messages["call_fast"] == "fast 3"
+    assert messages["call_missing"].startswith("Error: Unknown tool 'ToolMissing'")
+
+
+@pytest.mark.parametrize("arguments", ['{"value": "abc"}', "[1]"])
+async def test_invalid_tool_arguments_are_reported_to_the_model(fake_client, arguments):
+    fake_client(
+        [_chunk(tool_calls=[(0, "call_bad", "ToolFast", arguments), (1, "call_good", "ToolFast", '{"value": 4}')])],
+        [_chunk(content="ok")],
+    )
+    test_agent = Agent(system_prompt="system", model="test", tools=[ToolFast])
+    test_agent.add_user_message("go")
+
+    # The bad call must not abort the turn; the good call still runs
+    events = await _run(test_agent)
+
+    assert any(isinstance(e, EventText) and "Invalid arguments for tool 'ToolFast'" in e.text for e in events)
+    messages = dict(_tool_messages(test_agent))
+    assert messages["call_good"] == "fast 4"
+    assert messages["call_bad"].startswith("Error: Invalid arguments for tool 'ToolFast'")
+    assert isinstance(events[-1], EventText) and events[-1].text == "ok"
+
+
+def test_history_trimming_drops_orphaned_tool_results(monkeypatch):
+    monkeypatch.setattr(agent, "MAX_CONTEXT_MESSAGES", 3)
+    test_agent = Agent(system_prompt="system", model="test", tools=[ToolFast])
+    test_agent.add_user_message("first")
+    test_agent.messages.append({"role": "assistant", "content": "", "tool_calls": [{"id": "call_1"}]})
+    test_agent.messages.append({"role": "tool", "tool_call_id": "call_1", "content": "result"})
+    test_agent.add_user_message("second")
+
+    # The ring buffer keeps only the last three messages
+    assert isinstance(test_agent.messages, deque) and test_agent.messages.maxlen == 3
+    assert [m["role"] for m in test_agent.messages] == ["assistant", "tool", "user"]
+
+    # Once the assistant turn falls out too, its tool result can't be sent on its own
+    test_agent.messages.popleft()
+    assert [m["role"] for m in test_agent._build_messages()] == ["system", "user"]
+
+
+async def test_batched_loop_delivers_every_event_in_order(fake_client):
+    fake_client([_chunk(content=f"part {i} ") for i in range(10)])
+    test_agent = Agent(system_prompt="system", model="test", tools=[ToolFast])
+    test_agent.add_user_message("go")
+
+    batches = [batch async for batch in test_agent.agentic_loop_batched(max_batch=4, emit_input_json=False)]
+
+    assert all(0 < len(batch) <= 4 for batch in batches)
+    assert "".join(e.text for batch in batches for e in batch) == "".join(f"part {i} " for i in range(10))
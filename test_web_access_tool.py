@@ -7,7 +7,7 @@ class TestWebAccessTool(unittest.TestCase):
     def setUp(self):
         self.tool = WebAccessTool(base_url="http://localhost:8000")
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_search(self, mock_get):
         # Mock the response from the /search endpoint
         mock_get.return_value.status_code = 200
@@ -17,7 +17,7 @@ class TestWebAccessTool(unittest.TestCase):
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0]['title'], 'Example Result 1')
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_open_url(self, mock_get):
         # Mock the response from the /open_url endpoint
         mock_get.return_value.status_code = 200
@@ -26,5 +26,16 @@ class TestWebAccessTool(unittest.TestCase):
         result = self.tool.open_url("http://example.com")
         self.assertEqual(result['content'], 'Some sanitized content')
 
+    @patch('requests.Session.post')
+    def test_open_urls(self, mock_post):
+        # Mock the response from the /open_urls endpoint, one result per URL in order
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.json.return_value = [{'content': 'First'}, {'error': 'Failed to fetch URL.'}]
+
+        result = self.tool.open_urls(["http://example.com/1", "http://example.com/2"])
+        self.assertEqual(mock_post.call_args.kwargs['json'], {'urls': ["http://example.com/1", "http://example.com/2"]})
+        self.assertEqual(result[0]['content'], 'First')
+        self.assertIn('error', result[1])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,16 +1,273 @@
 
 import asyncio
+import importlib.util
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 import pytest
-from tools import ToolEditFile
-
-@pytest.mark.asyncio
-async def test_tool_edit_file(tmpdir):
-    test_file_path = tmpdir.join('test_file.txt')
-    edit_tool = ToolEditFile(file_path=str(test_file_path), content="Hello World!\n")
-    result = await edit_tool()
-    assert "File edited successfully" in result
-    
-    # Check if content was appended
-    with open(test_file_path, 'r') as f:
-        content = f.read()
-        assert "Hello World!" in content
+import tools
+from clients import get_docker_client
+from tools import (
+    ToolCurlCommand,
+    ToolEditFile,
+    ToolListDirectory,
+    ToolReadFile,
+    ToolSearchAndReplace,
+    ToolRunCommandInDevContainer,
+    ToolSearchFiles,
+    ToolUpsertFile,
+)
+
+
+HAS_DOCKER = get_docker_client() is not None
+IS_LINUX = sys.platform == "linux"
+HAS_BENCHMARK = importlib.util.find_spec("pytest_benchmark") is not None
+
+
+@pytest.fixture
+def fast_tmpdir(tmp_path_factory):
+    """A temporary directory on tmpfs (/dev/shm) when available, so file checks skip the disk."""
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        path = pathlib.Path(tempfile.mkdtemp(dir='/dev/shm'))
+        yield path
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        yield tmp_path_factory.mktemp('tt')
+
+
+@pytest.fixture
+def source_tree(fast_tmpdir, monkeypatch):
+    """100 small source files to search, with the tree as the working directory."""
+    for i in range(100):
+        (fast_tmpdir / f'module_{i}.py').write_text(f"def function_{i}():\n    return {i}\n" * 20)
+    monkeypatch.chdir(fast_tmpdir)
+    return fast_tmpdir
+
+
+@pytest.mark.skipif(not HAS_DOCKER, reason="ToolEditFile requires Docker")
+async def test_tool_edit_file(container_scratch_dir):
+    test_file_path = f"{container_scratch_dir}/test_file.txt"
+    for _ in range(2):
+        result = await ToolEditFile(file_path=test_file_path, content="Hello World!\n")()
+        assert "File edited successfully" in result
+
+    # The file is written inside the container, so it is read back from there;
+    # comparing the whole output proves the content was appended and nothing else written
+    content = await ToolRunCommandInDevContainer(command=f"cat {test_file_path}")()
+    assert content == "Hello World!\nHello World!\n"
+
+
+async def test_host_tools_concurrently(tmp_path, monkeypatch):
+    # The host-side tools are independent and I/O bound, so they run together
+    (tmp_path / 'notes.txt').write_text("alpha\nneedle here\n")
+    monkeypatch.chdir(tmp_path)
+
+    read_result, list_result, search_result = await asyncio.gather(
+        ToolReadFile(file_path='notes.txt')(),
+        ToolListDirectory(directory_path='.')(),
+        ToolSearchFiles(pattern='needle')(),
+    )
+
+    assert "needle here" in read_result
+    assert "FILE: notes.txt" in list_result
+    assert "notes.txt:2: needle here" in search_result
+
+
+async def test_host_tools_reject_sibling_prefix_dir(tmp_path, monkeypatch):
+    # /proj2 shares the /proj string prefix but is outside the project
+    project = tmp_path / 'proj'
+    sibling = tmp_path / 'proj2'
+    project.mkdir()
+    sibling.mkdir()
+    (sibling / 'secret.txt').write_text("needle\n")
+    monkeypatch.chdir(project)
+
+    read_result, list_result, search_result = await asyncio.gather(
+        ToolReadFile(file_path='../proj2/secret.txt')(),
+        ToolListDirectory(directory_path='../proj2')(),
+        ToolSearchFiles(pattern='needle', directory='../proj2')(),
+    )
+
+    assert read_result.startswith("Error: Cannot read files outside")
+    assert list_result.startswith("Error: Cannot access directories outside")
+    assert search_result.startswith("Error: Cannot search outside")
+
+
+async def test_search_files_literal_fastpath(tmp_path, monkeypatch):
+    # Plain-text and regex patterns find the same lines; an empty PATH forces the Python walk
+    (tmp_path / 'notes.txt').write_text("alpha\nneedle here\n")
+    (tmp_path / 'other.txt').write_text("needl\ne here\n")
+    (tmp_path / 'bin').mkdir()
+    monkeypatch.setenv('PATH', str(tmp_path / 'bin'))
+    monkeypatch.chdir(tmp_path)
+
+    literal_result = await ToolSearchFiles(pattern='needle')()
+    regex_result = await ToolSearchFiles(pattern='ne+dle h.re')()
+    missing_result = await ToolSearchFiles(pattern='needle there')()
+
+    assert literal_result.splitlines()[2:] == ["notes.txt:2: needle here"]
+    assert regex_result.splitlines()[2:] == ["notes.txt:2: needle here"]
+    assert missing_result.startswith("No matches found")
+
+
+@pytest.mark.skipif(not IS_LINUX, reason="ru_maxrss is only reported in KiB on Linux")
+@pytest.mark.skipif(not HAS_DOCKER, reason="ToolSearchAndReplace requires Docker")
+async def test_search_and_replace_large_file_memory(tmp_path):
+    # A large file without matches must not be pulled into memory whole
+    import resource
+
+    size = 64 * 1024 * 1024
+    chunk = b'a' * (1024 * 1024)
+    big_file = tmp_path / 'big.txt'
+    with open(big_file, 'wb') as f:
+        for _ in range(size // len(chunk)):
+            f.write(chunk)
+
+    before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result = await ToolSearchAndReplace(pattern='needle', replacement='pin', directory=str(tmp_path))()
+    after_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    assert "completed successfully" in result
+    assert (after_kb - before_kb) * 1024 < 2 * size
+
+
+@pytest.mark.skipif(not HAS_DOCKER, reason="ToolSearchAndReplace requires Docker")
+async def test_search_and_replace_literal_fastpath(tmp_path):
+    # Patterns are plain text: regex metacharacters match themselves, line endings and binary files are untouched
+    (tmp_path / 'a.py').write_bytes(b"foo.x = 1\r\nprint(fooXx)\r\n")
+    (tmp_path / 'b.bin').write_bytes(b"\x00\xff\xfe foo.x")
+    (tmp_path / 'c.txt').write_bytes(b"nothing to see\n")
+
+    result = await ToolSearchAndReplace(pattern='foo.x', replacement='bar', directory=str(tmp_path))()
+
+    assert "completed successfully" in result
+    assert (tmp_path / 'a.py').read_bytes() == b"bar = 1\r\nprint(fooXx)\r\n"
+    assert (tmp_path / 'b.bin').read_bytes() == b"\x00\xff\xfe foo.x"
+    assert (tmp_path / 'c.txt').read_bytes() == b"nothing to see\n"
+
+
+@pytest.mark.skipif(not HAS_DOCKER, reason="ToolSearchAndReplace requires Docker")
+async def test_search_and_replace_excludes(tmp_path):
+    # Only version control and cache directories are skipped by default; build output is opt-in
+    for name in ('.git', 'build', 'src'):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / 'file.txt').write_text("foo\n")
+
+    await ToolSearchAndReplace(pattern='foo', replacement='bar', directory=str(tmp_path))()
+    assert [(tmp_path / name / 'file.txt').read_text() for name in ('.git', 'build', 'src')] == ["foo\n", "bar\n", "bar\n"]
+
+    await ToolSearchAndReplace(pattern='bar', replacement='baz', directory=str(tmp_path), excludes=['.git', 'bu*'])()
+    assert [(tmp_path / name / 'file.txt').read_text() for name in ('.git', 'build', 'src')] == ["foo\n", "bar\n", "baz\n"]
+
+
+@pytest.mark.skipif(not HAS_DOCKER, reason="ToolSearchAndReplace requires Docker")
+async def test_search_and_replace_leaves_symlinks_in_place(tmp_path):
+    # The target is rewritten once through its own entry and the link keeps pointing at it
+    tree = tmp_path / 'tree'
+    tree.mkdir()
+    (tree / 'target.txt').write_text("foo\n")
+    (tmp_path / 'outside.txt').write_text("foo\n")
+    try:
+        (tree / 'link.txt').symlink_to(tree / 'target.txt')
+        (tree / 'outside_link.txt').symlink_to(tmp_path / 'outside.txt')
+    except OSError as e:
+        pytest.skip(f"symlinks not supported: {e}")
+
+    result = await ToolSearchAndReplace(pattern='foo', replacement='foofoo', directory=str(tree))()
+
+    assert "completed successfully" in result
+    assert (tree / 'link.txt').is_symlink() and (tree / 'outside_link.txt').is_symlink()
+    assert (tree / 'target.txt').read_text() == "foofoo\n"
+    assert (tmp_path / 'outside.txt').read_text() == "foo\n"
+
+
+@pytest.fixture
+def container_scratch_dir():
+    """A scratch directory in the dev container, removed again after the test."""
+    directory = "/tmp/tool_tests_scratch"
+    setup = ToolRunCommandInDevContainer(command=f"mkdir -p {directory}")._run()
+    if setup.startswith("Error"):
+        pytest.skip(f"dev container not usable: {setup}")
+    yield directory
+    ToolRunCommandInDevContainer(command=f"rm -rf {directory}")._run()
+
+
+@pytest.mark.skipif(not HAS_DOCKER, reason="ToolUpsertFile requires Docker")
+async def test_upsert_many_files_bulk(container_scratch_dir):
+    # Many small files written per tool call and in one archive end up with the same content
+    files = {f"{container_scratch_dir}/file_{i}.txt": f"content {i}\n" for i in range(256)}
+
+    results = await asyncio.gather(*(
+        asyncio.to_thread(ToolUpsertFile(file_path=path, content=content)._run)
+        for path, content in files.items()
+    ))
+    assert all("successfully" in result for result in results)
+
+    # Rewriting an existing file keeps its mode
+    await ToolRunCommandInDevContainer(command=f"chmod 755 {container_scratch_dir}/file_0.txt")()
+    bulk_result = await asyncio.to_thread(tools.upsert_files, {path: content.upper() for path, content in files.items()})
+    assert "successfully" in bulk_result
+
+    listing = await ToolRunCommandInDevContainer(
+        command=f"cat {container_scratch_dir}/file_255.txt; ls {container_scratch_dir} | wc -l; "
+                f"stat -c %a {container_scratch_dir}/file_0.txt {container_scratch_dir}/file_1.txt"
+    )()
+    assert listing.split() == ["CONTENT", "255", "256", "755", "644"]
+
+
+@pytest.mark.skipif(shutil.which("curl") is None, reason="curl is not installed")
+async def test_curl_command_runs_without_shell():
+    result = await ToolCurlCommand(command="--version")()
+    assert "executed successfully" in result
+    assert "curl" in result
+
+
+# Hot-path benchmarks; compare runs with pytest --benchmark-compare to catch slowdowns
+@pytest.mark.skipif(not HAS_BENCHMARK, reason="needs pytest-benchmark")
+def test_search_files_benchmark(benchmark, source_tree):
+    result = benchmark(ToolSearchFiles(pattern='return 42')._run)
+    assert "module_42.py" in result
+
+
+@pytest.mark.skipif(not HAS_BENCHMARK, reason="needs pytest-benchmark")
+def test_read_file_benchmark(benchmark, source_tree):
+    result = benchmark(ToolReadFile(file_path='module_0.py')._run)
+    assert "def function_0" in result
+
+
+@pytest.mark.skipif(not HAS_BENCHMARK or not HAS_DOCKER, reason="needs pytest-benchmark and Docker")
+def test_search_and_replace_benchmark(benchmark, source_tree):
+    # No file contains the pattern, so every run is the same read-only pass
+    result = benchmark(ToolSearchAndReplace(pattern='no such text', replacement='x', directory=str(source_tree))._run)
+    assert "completed successfully" in result
+
+
+@pytest.mark.skipif(not HAS_BENCHMARK or not HAS_DOCKER, reason="needs pytest-benchmark and Docker")
+def test_upsert_benchmark(benchmark):
+    result = benchmark(ToolUpsertFile(file_path='/dev/shm/tool_tests_benchmark.txt', content='x' * 4096)._run)
+    assert "successfully" in result
+
+
+# Many small files, one tool call each versus one archive; the pair is reported side by side
+@pytest.mark.skipif(not HAS_BENCHMARK or not HAS_DOCKER, reason="needs pytest-benchmark and Docker")
+def test_upsert_many_per_file_benchmark(benchmark, container_scratch_dir):
+    benchmark.group = "upsert-many"
+    files = {f"{container_scratch_dir}/file_{i}.txt": f"content {i}\n" for i in range(256)}
+
+    def write_each():
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            return list(executor.map(lambda item: ToolUpsertFile(file_path=item[0], content=item[1])._run(), files.items()))
+
+    results = benchmark(write_each)
+    assert all("successfully" in result for result in results)
+
+
+@pytest.mark.skipif(not HAS_BENCHMARK or not HAS_DOCKER, reason="needs pytest-benchmark and Docker")
+def test_upsert_many_bulk_benchmark(benchmark, container_scratch_dir):
+    benchmark.group = "upsert-many"
+    files = {f"{container_scratch_dir}/file_{i}.txt": f"content {i}\n" for i in range(256)}
+    result = benchmark(tools.upsert_files, files)
+    assert "successfully" in result
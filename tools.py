@@ -5,11 +5,34 @@ These tools allow the agent to run commands in Docker containers and manipulate
 """
 
 import asyncio
+import codecs
+import contextlib
+import copy
+import fnmatch
+import functools
+import io
+import itertools
+import mmap
 import os
+import posixpath
+import re
+import shlex
+import stat
+import struct
+import subprocess
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import ClassVar, Optional
 from pydantic import BaseModel, Field
-from clients import docker_client
+from clients import get_docker_client, http_session
+from utils import truncate
 import docker.errors as docker_errors
 import requests
 
@@ -17,72 +40,385 @@ import requests
 class Tool(BaseModel):
     """Base class for all tools."""
 
+    # Name of the field the UI shows next to the tool name, if any
+    _primary_repr: ClassVar[Optional[str]] = None
+
     async def __call__(self) -> str:
         raise NotImplementedError
 
 
-class ToolRunCommandInDevContainer(Tool):
-    """Run a command in the dev container you have at your disposal to test and run code.
+# Largest command output returned to the model; anything past it is drained and dropped
+_COMMAND_OUTPUT_LIMIT = 4 * 1024 * 1024
+_TRUNCATED_NOTE = f"\n... [output truncated at {_COMMAND_OUTPUT_LIMIT // (1024 * 1024)} MB]"
 
-    The command will run in the container and the output will be returned.
 
-    The container is a Python development container with Python 3.12 installed.
+class _ShellUnavailable(Exception):
+    """The persistent shell closed before any of a command was sent, so it is safe to run it another way."""
 
-    It has the port 8888 exposed to the host in case the user asks you to run an http server.
+
+class _PersistentShell:
+    """A long-lived bash in the dev container that starts commands one at a time.
+
+    Each command still runs in its own `bash -c`, so directory changes and exports don't leak
+    between calls, but it is started by this resident shell over an attached socket instead of
+    a fresh Docker exec, saving the exec create/start/inspect round trips to the daemon.
     """
 
-    command: str
+    def __init__(self, container):
+        api = container.client.api
+        exec_id = api.exec_create(container.id, ["bash"], stdin=True, stdout=True, stderr=True)["Id"]
+        sock = api.exec_start(exec_id, socket=True)
+        # exec_start returns a SocketIO wrapper on Unix; frames are read from the raw socket
+        self._sock = getattr(sock, "_sock", sock)
+        self._token = f"__DEV_SHELL_DONE_{uuid.uuid4().hex}__"
+        self._marker = f"\n{self._token}".encode()
+        self.lock = threading.Lock()
+
+    def run(self, command: str) -> tuple[int, bytes, bool]:
+        """Run a command and return its exit code, combined stdout/stderr and whether that was truncated."""
+        # The command is quoted as one word, so whatever it contains the resident shell
+        # always sees a complete line; syntax errors are reported by the inner bash
+        script = f"bash -c {shlex.quote(command)} </dev/null 2>&1; printf '\\n{self._token}%d\\n' $?\n".encode("utf-8")
+        if not self._drain():
+            raise _ShellUnavailable("dev container shell closed")
+
+        # Once any of the script has been sent the command may be running, so from here
+        # on failures are reported rather than retried, which could run it twice
+        sent = 0
+        try:
+            while sent < len(script):
+                sent += self._sock.send(script[sent:])
+        except OSError as e:
+            if not sent:
+                raise _ShellUnavailable(e) from e
+            raise ConnectionError(f"dev container shell failed while sending the command: {e}") from e
+
+        output = bytearray()
+        search_from = 0
+        while True:
+            end = output.find(self._marker, search_from)
+            if end != -1:
+                line_end = output.find(b"\n", end + len(self._marker))
+                if line_end != -1:
+                    truncated = end > _COMMAND_OUTPUT_LIMIT
+                    return int(output[end + len(self._marker):line_end]), bytes(output[:min(end, _COMMAND_OUTPUT_LIMIT)]), truncated
+            else:
+                # Past the limit only the bytes that could start the marker are kept
+                if len(output) > _COMMAND_OUTPUT_LIMIT + len(self._marker):
+                    del output[_COMMAND_OUTPUT_LIMIT:len(output) - len(self._marker)]
+                search_from = max(0, len(output) - len(self._marker))
 
-    def _run(self) -> str:
-        if docker_client is None:
-            return "Error: Docker client not available. Please ensure Docker is running."
+            try:
+                frame = self._read_frame()
+            except OSError:
+                frame = None
+            if frame is None:
+                raise ConnectionError("dev container shell closed while the command was running")
+            output += frame
+
+    def close(self):
+        try:
+            self._sock.close()
+        except OSError:
+            pass
 
+    def _recv_exactly(self, size: int) -> Optional[bytes]:
+        data = bytearray()
+        while len(data) < size:
+            chunk = self._sock.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return bytes(data)
+
+    def _drain(self) -> bool:
+        """Discard output background jobs wrote after an earlier command's marker; False if the shell closed."""
+        timeout = self._sock.gettimeout()
+        while True:
+            self._sock.settimeout(0)
+            try:
+                pending = self._sock.recv(8)
+            except BlockingIOError:
+                return True
+            except OSError:
+                return False
+            finally:
+                self._sock.settimeout(timeout)
+            # A frame has started arriving; read the rest of it so the stream stays aligned
+            try:
+                if not pending or self._read_frame(pending) is None:
+                    return False
+            except OSError:
+                return False
+
+    def _read_frame(self, header_start: bytes = b"") -> Optional[bytes]:
+        """Read one frame of Docker's multiplexed stdout/stderr stream (None once it closes)."""
+        header = self._recv_exactly(8 - len(header_start))
+        if header is None:
+            return None
+        header = header_start + header
+        _, size = struct.unpack(">BxxxL", header)
+        return self._recv_exactly(size)
+
+
+_dev_shell: Optional[_PersistentShell] = None
+_dev_shell_guard = threading.Lock()
+
+
+def _get_dev_shell() -> Optional[_PersistentShell]:
+    """Return the shared dev container shell, starting it on first use (None if unavailable)."""
+    global _dev_shell
+    with _dev_shell_guard:
+        if _dev_shell is None:
+            container, error = _get_dev_container()
+            if error:
+                return None
+            try:
+                _dev_shell = _PersistentShell(container)
+            except Exception:
+                return None
+        return _dev_shell
+
+
+def _reset_dev_shell(shell: Optional[_PersistentShell] = None):
+    """Close the shared dev container shell (only if it is still `shell`, when given)."""
+    global _dev_shell
+    with _dev_shell_guard:
+        if _dev_shell is not None and (shell is None or _dev_shell is shell):
+            _dev_shell.close()
+            _dev_shell = None
+
+
+# Cached handle for the python-dev container, so each tool call skips the lookup RPC.
+# Its status is not refreshed; callers drop it when the daemon says the container is gone.
+_dev_container = None
+_dev_container_guard = threading.Lock()
+
+
+def _get_dev_container():
+    """Return (container, None) for the running python-dev container, or (None, error message)."""
+    global _dev_container
+    docker_client = get_docker_client()
+    if docker_client is None:
+        return None, "Error: Docker client not available. Please ensure Docker is running."
+
+    with _dev_container_guard:
         try:
-            # Get the container
-            container = docker_client.containers.get("python-dev")
+            if _dev_container is None:
+                _dev_container = docker_client.containers.get("python-dev")
         except docker_errors.NotFound:
-            return "Error: Python development container 'python-dev' not found. The container may not have started properly."
+            _dev_container = None
+            return None, "Error: Python development container 'python-dev' not found. The container may not have started properly."
         except Exception as e:
-            return f"Error: Failed to access container: {e}"
+            _dev_container = None
+            return None, f"Error: Failed to access container: {e}"
 
-        # Check if container is running
-        container.reload()
+        container = _dev_container
         if container.status != "running":
-            return f"Error: Container 'python-dev' is not running (status: {container.status}). Please restart the agent."
+            # Look the container up again next time rather than trusting a stale handle
+            _dev_container = None
+            return None, f"Error: Container 'python-dev' is not running (status: {container.status}). Please restart the agent."
+        return container, None
+
+
+def _reset_dev_container():
+    """Forget the cached python-dev container handle."""
+    global _dev_container
+    with _dev_container_guard:
+        _dev_container = None
+
 
-        # Use bash -c to properly execute shell commands with operators
-        # Ensure command doesn't contain Windows-style paths that would fail in Linux container
-        if "\\" in self.command and ".exe" in self.command.lower():
-            return f"Error: Command contains Windows-style executable path which won't work in Linux container: {self.command}"
-        exec_command = ["bash", "-c", self.command]
+def _forget_dev_container_if_gone(error: Exception):
+    """Drop the cached handle when a Docker error may mean the container was removed or stopped."""
+    if isinstance(error, docker_errors.APIError) and error.status_code in (404, 409):
+        _reset_dev_container()
 
+
+def _container_path(container, file_path: str) -> str:
+    """Resolve a path the way a process in the container would, relative to its working directory."""
+    workdir = container.attrs.get("Config", {}).get("WorkingDir") or "/"
+    return posixpath.normpath(posixpath.join(workdir, file_path))
+
+
+def _get_container_file(container, path: str) -> tuple[bytes, Optional[tarfile.TarInfo]]:
+    """Read a file out of the container with one get_archive call; (b"", None) if it doesn't exist."""
+    try:
+        stream, _ = container.get_archive(path)
+    except docker_errors.NotFound:
+        return b"", None
+    with tarfile.open(fileobj=io.BytesIO(b"".join(stream))) as tar:
+        member = tar.next()
+        if member is None or not member.isfile():
+            raise IsADirectoryError(f"Not a regular file: {path}")
+        return tar.extractfile(member).read(), member
+
+
+# Writes that depend on a file's current state hold that path's lock, so two concurrent
+# calls can't both read the old file and lose one of the updates
+_container_file_locks: dict[str, threading.Lock] = {}
+_container_file_locks_guard = threading.Lock()
+
+
+def _container_file_lock(path: str) -> threading.Lock:
+    """Return the lock serializing writes to one container path."""
+    with _container_file_locks_guard:
+        return _container_file_locks.setdefault(path, threading.Lock())
+
+
+def _put_container_files(container, directory: str, entries: list[tuple[str, bytes, Optional[tarfile.TarInfo]]]):
+    """Write files into the container with one put_archive call, streaming the raw bytes.
+
+    entries are (name relative to directory, data, template) triples; passing the
+    existing file's tar entry as template keeps its mode and ownership.
+    """
+    mtime = int(time.time())
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, data, template in entries:
+            info = copy.copy(template) if template is not None else tarfile.TarInfo()
+            if template is None:
+                info.mode = 0o644
+            info.name = name
+            info.size = len(data)
+            info.mtime = mtime
+            tar.addfile(info, io.BytesIO(data))
+    container.put_archive(directory, buffer.getvalue())
+
+
+def _put_container_file(container, path: str, data: bytes, template: Optional[tarfile.TarInfo] = None):
+    """Write one file into the container; see _put_container_files."""
+    _put_container_files(container, posixpath.dirname(path) or "/", [(posixpath.basename(path), data, template)])
+
+
+def _stat_container_files(container, paths: list[str]) -> dict[str, tarfile.TarInfo]:
+    """Look up the mode and owner of existing container files with one exec; missing paths are left out."""
+    _, (stdout, _) = container.exec_run(["stat", "-c", "%a %u %g %n", "--", *paths], demux=True)
+    templates = {}
+    for line in (stdout or b"").decode("utf-8", errors="replace").splitlines():
+        mode, uid, gid, path = line.split(" ", 3)
+        info = tarfile.TarInfo()
+        info.mode, info.uid, info.gid = int(mode, 8), int(uid), int(gid)
+        templates[path] = info
+    return templates
+
+
+def _run_in_container_sync(command: str) -> str:
+    """Run a shell command in the dev container and return its output or an error message."""
+    # Ensure command doesn't contain Windows-style paths that would fail in Linux container
+    if "\\" in command and ".exe" in command.lower():
+        return f"Error: Command contains Windows-style executable path which won't work in Linux container: {command}"
+
+    # Use the resident shell when it's free; a concurrent call takes the one-off exec path
+    # rather than waiting behind a long-running command
+    shell = _get_dev_shell()
+    if shell is not None and shell.lock.acquire(blocking=False):
         try:
-            result = container.exec_run(exec_command)
-            exit_code = result.exit_code
-            output = result.output
-
-            # Debug: print raw output type and length
-            # print(f"DEBUG: exit_code={exit_code}, output_type={type(output)}, output_len={len(output) if hasattr(output, '__len__') else 'N/A'}")
-
-            if isinstance(output, bytes):
-                output_str = output.decode("utf-8")
-            elif isinstance(output, tuple) and len(output) >= 2:
-                # Handle case where output is (stdout, stderr) tuple
-                stdout_bytes, stderr_bytes = output[0], output[1]
-                stdout_str = stdout_bytes.decode("utf-8") if isinstance(stdout_bytes, bytes) else str(stdout_bytes)
-                stderr_str = stderr_bytes.decode("utf-8") if isinstance(stderr_bytes, bytes) else str(stderr_bytes)
-                output_str = stdout_str + stderr_str
-            else:
-                output_str = str(output)
+            exit_code, output, truncated = shell.run(command)
+        except _ShellUnavailable:
+            # Nothing ran, e.g. the container was restarted; start a new shell next time
+            _reset_dev_shell(shell)
+        except Exception as e:
+            _reset_dev_shell(shell)
+            return f"""Error executing command: {e}
 
+Command attempted: {command}"""
+        else:
+            output_str = output.decode("utf-8", errors="replace")
+            if truncated:
+                output_str += _TRUNCATED_NOTE
             if exit_code != 0:
                 return f"Command failed with exit code {exit_code}:\n{output_str}"
             return output_str
-        except Exception as e:
-            return f"""Error executing command: {e}
+        finally:
+            shell.lock.release()
+
+    return _run_in_container_exec(command)
+
+
+def _run_in_container_exec(command: str) -> str:
+    """Run the command through a one-off Docker exec."""
+    container, error = _get_dev_container()
+    if error:
+        return error
+
+    # Use bash -c to properly execute shell commands with operators
+    exec_command = ["bash", "-c", command]
+
+    try:
+        api = container.client.api
+        try:
+            exec_id = api.exec_create(container.id, exec_command)["Id"]
+        except docker_errors.APIError as e:
+            # 404/409: the cached container was removed or stopped; look it up again once
+            if e.status_code not in (404, 409):
+                raise
+            _forget_dev_container_if_gone(e)
+            container, error = _get_dev_container()
+            if error:
+                return error
+            api = container.client.api
+            exec_id = api.exec_create(container.id, exec_command)["Id"]
+
+        # Decode chunks as they arrive instead of buffering the whole output first
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        buffer = io.StringIO()
+        size = 0
+        truncated = False
+        for chunk in api.exec_start(exec_id, stream=True):
+            if truncated:
+                # Keep draining so the command finishes and its exit code is final
+                continue
+            if size + len(chunk) > _COMMAND_OUTPUT_LIMIT:
+                chunk = chunk[:_COMMAND_OUTPUT_LIMIT - size]
+                truncated = True
+            size += len(chunk)
+            buffer.write(decoder.decode(chunk))
+
+        if truncated:
+            buffer.write(_TRUNCATED_NOTE)
+        else:
+            buffer.write(decoder.decode(b"", final=True))
+        output_str = buffer.getvalue()
+        exit_code = api.exec_inspect(exec_id)["ExitCode"]
+
+        if exit_code != 0:
+            return f"Command failed with exit code {exit_code}:\n{output_str}"
+        return output_str
+    except Exception as e:
+        return f"""Error executing command: {e}
 
 Command attempted: {exec_command}"""
 
+
+def _to_thread(func):
+    """Turn a blocking function into a coroutine function that runs it on a worker thread."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return wrapper
+
+
+# Internal callers use this directly, skipping the pydantic model the LLM-facing tool needs
+_run_in_container_async = _to_thread(_run_in_container_sync)
+
+
+class ToolRunCommandInDevContainer(Tool):
+    """Run a command in the dev container you have at your disposal to test and run code.
+
+    The command will run in the container and the output will be returned.
+
+    The container is a Python development container with Python 3.12 installed.
+
+    It has the port 8888 exposed to the host in case the user asks you to run an http server.
+    """
+
+    _primary_repr: ClassVar[Optional[str]] = "command"
+
+    command: str
+
+    def _run(self) -> str:
+        return _run_in_container_sync(self.command)
+
     async def __call__(self) -> str:
         return await asyncio.to_thread(self._run)
 
@@ -93,62 +429,68 @@ class ToolUpsertFile(Tool):
     If the file exists, it will be updated, otherwise it will be created.
     """
 
+    _primary_repr: ClassVar[Optional[str]] = "file_path"
+
     file_path: str = Field(description="The path to the file to create or update")
     content: str = Field(description="The content of the file")
 
     def _run(self) -> str:
-        if docker_client is None:
-            return "Error: Docker client not available. Please ensure Docker is running."
-
-        try:
-            # Get the container
-            container = docker_client.containers.get("python-dev")
-        except docker_errors.NotFound:
-            return "Error: Python development container 'python-dev' not found. The container may not have started properly."
-        except Exception as e:
-            return f"Error: Failed to access container: {e}"
-
-        # Check if container is running
-        container.reload()
-        if container.status != "running":
-            return f"Error: Container 'python-dev' is not running (status: {container.status}). Please restart the agent."
-
-        # Use Python with base64 to handle any content safely
-        import base64
-        encoded_content = base64.b64encode(self.content.encode('utf-8')).decode('utf-8')
-        cmd = f"python3 -c \"import base64, sys; content = base64.b64decode('{encoded_content}').decode('utf-8'); open('{self.file_path}', 'w').write(content)\""
+        container, error = _get_dev_container()
+        if error:
+            return error
 
         # Validate that we're not using Windows paths in Linux container
-        if "\\" in cmd:
+        if "\\" in self.file_path:
             return f"Error: File path contains backslashes which are invalid in Linux container: {self.file_path}"
 
         try:
-            # Execute the command
-            exit_code, output = container.exec_run(cmd, stdout=True, stderr=True)
-
-            if isinstance(output, bytes):
-                output_str = output.decode("utf-8")
-            else:
-                output_str = str(output)
-
-            if exit_code == 0:
-                return "File written successfully"
-            else:
-                return f"""Error writing file: Command failed with exit code {exit_code}
-
-File path: {self.file_path}
-Command attempted: {cmd}
-Error output: {output_str}"""
+            # Stream the content to the daemon as a one-file tar, no shell or encoding round trips;
+            # an existing file keeps its mode and owner, as it did when written in place
+            path = _container_path(container, self.file_path)
+            with _container_file_lock(path):
+                _, info = _get_container_file(container, path)
+                _put_container_file(container, path, self.content.encode('utf-8'), template=info)
+            return "File written successfully"
         except Exception as e:
+            _forget_dev_container_if_gone(e)
             return f"""Error writing file: {e}
 
-File path: {self.file_path}
-Command attempted: {cmd}"""
+File path: {self.file_path}"""
 
     async def __call__(self) -> str:
         return await asyncio.to_thread(self._run)
 
 
+def upsert_files(files: dict[str, str]) -> str:
+    """Create or update several files in the dev container with a single put_archive call.
+
+    Existing files keep their mode and owner, as they do with ToolUpsertFile.
+    """
+    container, error = _get_dev_container()
+    if error:
+        return error
+
+    bad_paths = [path for path in files if "\\" in path]
+    if bad_paths:
+        return f"Error: File paths contain backslashes which are invalid in Linux container: {', '.join(bad_paths)}"
+
+    try:
+        contents = {_container_path(container, path): content for path, content in files.items()}
+        # Locks are taken in a fixed order so two bulk writes can't deadlock on each other
+        with contextlib.ExitStack() as stack:
+            for path in sorted(contents):
+                stack.enter_context(_container_file_lock(path))
+            templates = _stat_container_files(container, list(contents))
+            _put_container_files(container, "/", [
+                (path.lstrip("/"), content.encode('utf-8'), templates.get(path))
+                for path, content in contents.items()
+            ])
+        return f"Files written successfully ({len(contents)} files)"
+    except Exception as e:
+        _forget_dev_container_if_gone(e)
+        return f"Error writing files: {e}"
+
+
 class ToolGitStatus(Tool):
     """Check the current git status within the development container.
 
@@ -157,7 +499,7 @@ class ToolGitStatus(Tool):
 
     async def __call__(self) -> str:
         command = "git status --porcelain"
-        return await ToolRunCommandInDevContainer(command=command)()
+        return await _run_in_container_async(command)
 
 
 class ToolGitBranch(Tool):
@@ -165,7 +507,11 @@ class ToolGitBranch(Tool):
 
     async def __call__(self) -> str:
         command = "git branch -a"
-        return await ToolRunCommandInDevContainer(command=command)()
+        return await _run_in_container_async(command)
+
+
+# Printed by ToolGitCreateBranch's container command when the branch is already there
+_BRANCH_EXISTS_MARKER = "__GIT_BRANCH_EXISTS__"
 
 
 class ToolGitCreateBranch(Tool):
@@ -174,16 +520,18 @@ class ToolGitCreateBranch(Tool):
     branch_name: str = Field(description="Name of the new branch to create")
 
     async def __call__(self) -> str:
-        # First check if branch already exists
-        check_command = f"git branch --list {self.branch_name}"
-        check_result = await ToolRunCommandInDevContainer(command=check_command)()
+        # Check for the branch and create it in one container command
+        branch = shlex.quote(self.branch_name)
+        command = (
+            f"if git show-ref --verify --quiet refs/heads/{branch}; "
+            f"then echo {_BRANCH_EXISTS_MARKER}; "
+            f"else git checkout -b {branch}; fi"
+        )
+        result = await _run_in_container_async(command)
 
-        if self.branch_name in check_result:
+        if result.strip() == _BRANCH_EXISTS_MARKER:
             return f"Branch '{self.branch_name}' already exists"
-
-        # Create and switch to the new branch
-        create_command = f"git checkout -b {self.branch_name}"
-        return await ToolRunCommandInDevContainer(command=create_command)()
+        return result
 
 
 class ToolGitAddFiles(Tool):
@@ -193,7 +541,7 @@ class ToolGitAddFiles(Tool):
 
     async def __call__(self) -> str:
         command = f"git add {self.files}"
-        return await ToolRunCommandInDevContainer(command=command)()
+        return await _run_in_container_async(command)
 
 
 class ToolGitCommit(Tool):
@@ -203,43 +551,55 @@ class ToolGitCommit(Tool):
 
     async def __call__(self) -> str:
         command = f"git commit -m \"{self.message}\""
-        return await ToolRunCommandInDevContainer(command=command)()
+        return await _run_in_container_async(command)
 
 
 class ToolGitPushBranch(Tool):
     """Push the current branch to remote repository."""
 
     async def __call__(self) -> str:
-        # Get current branch name
-        branch_command = "git rev-parse --abbrev-ref HEAD"
-        branch_result = await ToolRunCommandInDevContainer(command=branch_command)()
-        branch_name = branch_result.strip()
-
-        if "fatal" in branch_result or not branch_name:
-            return f"Error getting current branch: {branch_result}"
-
-        command = f"git push -u origin {branch_name}"
-        return await ToolRunCommandInDevContainer(command=command)()
+        # Resolve the current branch and push it in one container command
+        command = (
+            'branch=$(git rev-parse --abbrev-ref HEAD 2>&1) && [ -n "$branch" ] '
+            '|| { echo "Error getting current branch: $branch"; exit 1; }; '
+            'git push -u origin "$branch"'
+        )
+        return await _run_in_container_async(command)
 
 
 class ToolTmuxCommand(Tool):
     """Run a command in a tmux session within the development container."""
 
+    _primary_repr: ClassVar[Optional[str]] = "command"
+
     command: str = Field(description="The tmux command to execute")
 
-    async def _run(self) -> str:
-        tmux_command = f"tmux new-session -d -s mysession '{{self.command}}; bash'"
+    async def __call__(self) -> str:
+        # Reuse one long-lived session: create it only if it is missing, then type the command into it.
+        # send-keys -l sends the quoted command literally, so nothing in it is read as a key name
+        tmux_command = (
+            "tmux has-session -t mysession 2>/dev/null || tmux new-session -d -s mysession bash; "
+            f"tmux send-keys -t mysession -l {shlex.quote(self.command)} && tmux send-keys -t mysession Enter"
+        )
 
         try:
             # Run tmux command
-            result = await ToolRunCommandInDevContainer(command=tmux_command)()
-            return result
+            return await _run_in_container_async(tmux_command)
 
         except Exception as e:
             return f"Error executing tmux command: {e}"
 
-    async def __call__(self) -> str:
-        return await self._run()
+
+def _count_lines(path: Path) -> int:
+    """Count the lines in a file from raw bytes, without decoding it."""
+    count = 0
+    last = b'\n'
+    with open(path, 'rb') as f:
+        while chunk := f.read(1024 * 1024):
+            count += chunk.count(b'\n')
+            last = chunk[-1:]
+    # A final line without a trailing newline still counts
+    return count + (last != b'\n')
 
 
 class ToolReadFile(Tool):
@@ -249,6 +609,8 @@ class ToolReadFile(Tool):
     Useful for understanding the current codebase and planning modifications.
     """
 
+    _primary_repr: ClassVar[Optional[str]] = "file_path"
+
     file_path: str = Field(description="The path to the file to read, relative to the project root")
     offset: Optional[int] = Field(default=None, description="Line number to start reading from (1-indexed)")
     limit: Optional[int] = Field(default=None, description="Maximum number of lines to read")
@@ -260,7 +622,7 @@ class ToolReadFile(Tool):
 
             # Basic security check - prevent reading files outside the project
             cwd = Path.cwd()
-            if not str(full_path).startswith(str(cwd)):
+            if not full_path.is_relative_to(cwd):
                 return f"Error: Cannot read files outside the project directory. Requested: {full_path}, Project: {cwd}"
 
             if not full_path.exists():
@@ -269,27 +631,23 @@ class ToolReadFile(Tool):
             if not full_path.is_file():
                 return f"Error: Path is not a file: {full_path}"
 
-            with open(full_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-
             # Apply offset and limit if specified
-            start_line = (self.offset - 1) if self.offset else 0
+            start_line = max(self.offset - 1, 0) if self.offset else 0
             end_line = (start_line + self.limit) if self.limit else None
 
-            selected_lines = lines[start_line:end_line]
-
-            # Format output with line numbers
+            # Only the requested window is decoded and kept; earlier lines are skipped lazily
             result = []
-            for i, line in enumerate(selected_lines, start=start_line + 1):
-                result.append(f"{i:4d}|{line}")
+            with open(full_path, 'r', encoding='utf-8') as f:
+                for i, line in enumerate(itertools.islice(f, start_line, end_line), start=start_line + 1):
+                    result.append(f"{i:4d}|{line}")
 
             content = "".join(result)
 
             if self.offset or self.limit:
-                total_lines = len(lines)
-                return f"File: {self.file_path} (lines {start_line + 1}-{start_line + len(selected_lines)} of {total_lines})\n\n{content}"
+                total_lines = _count_lines(full_path)
+                return f"File: {self.file_path} (lines {start_line + 1}-{start_line + len(result)} of {total_lines})\n\n{content}"
             else:
-                return f"File: {self.file_path} ({len(lines)} lines)\n\n{content}"
+                return f"File: {self.file_path} ({len(result)} lines)\n\n{content}"
 
         except UnicodeDecodeError:
             return f"Error: File contains binary data or unsupported encoding: {self.file_path}"
@@ -316,7 +674,7 @@ class ToolListDirectory(Tool):
 
             # Basic security check
             cwd = Path.cwd()
-            if not str(full_path).startswith(str(cwd)):
+            if not full_path.is_relative_to(cwd):
                 return f"Error: Cannot access directories outside the project directory. Requested: {full_path}, Project: {cwd}"
 
             if not full_path.exists():
@@ -325,14 +683,16 @@ class ToolListDirectory(Tool):
             if not full_path.is_dir():
                 return f"Error: Path is not a directory: {full_path}"
 
-            items = []
-            for item in sorted(full_path.iterdir()):
-                if not self.show_hidden and item.name.startswith('.'):
-                    continue
+            # DirEntry caches the file type from readdir, so only file sizes need a stat call
+            with os.scandir(full_path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
 
-                item_type = "DIR" if item.is_dir() else "FILE"
-                size = f" ({item.stat().st_size} bytes)" if item.is_file() else ""
-                items.append(f"{item_type}: {item.name}{size}")
+            items = [
+                f"{'DIR' if entry.is_dir() else 'FILE'}: {entry.name}"
+                + (f" ({entry.stat().st_size} bytes)" if entry.is_file() else "")
+                for entry in entries
+                if self.show_hidden or not entry.name.startswith('.')
+            ]
 
             if not items:
                 return f"Directory: {self.directory_path}\n\n(No items found)"
@@ -346,6 +706,91 @@ class ToolListDirectory(Tool):
         return await asyncio.to_thread(self._run)
 
 
+# Characters that make a search pattern a regular expression rather than plain text
+_REGEX_METACHARS = frozenset(".^$*+?{}[]\\|()")
+
+# Binary formats that never yield text matches; skipped before opening
+_SEARCH_SKIP_SUFFIXES = frozenset({".pyc", ".pyo", ".so", ".o", ".a", ".png", ".jpg", ".jpeg", ".gif", ".ico", ".zip", ".gz", ".tar", ".whl", ".pdf"})
+
+# Maximum number of matches returned by ToolSearchFiles
+_SEARCH_MAX_MATCHES = 50
+
+# Seconds a ripgrep search may run before it is killed
+_RIPGREP_TIMEOUT = 30
+
+
+def _ripgrep_search(pattern: str, literal: bool, file_pattern: Optional[str], search_dir: Path, cwd: Path, max_file_bytes: int) -> Optional[list[str]]:
+    """Search with ripgrep, returning up to one match past the limit as 'path:line: text' entries.
+
+    Returns None when ripgrep is not installed or rejects the pattern, so the
+    caller can fall back to the Python walk.
+    """
+    # Hidden and ignored files are searched too, as the Python walk does; --null ends
+    # each path with a NUL, so paths containing ':' still split correctly
+    cmd = ["rg", "--line-number", "--no-heading", "--with-filename", "--null", "--color", "never",
+           "--hidden", "--no-ignore",
+           "--max-count", str(_SEARCH_MAX_MATCHES + 1), "--max-filesize", str(max_file_bytes)]
+    if literal:
+        cmd.append("--fixed-strings")
+    if file_pattern:
+        cmd += ["--glob", file_pattern]
+    cmd += ["--regexp", pattern, "--", os.path.relpath(search_dir, cwd)]
+
+    try:
+        proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except (FileNotFoundError, PermissionError):
+        return None
+
+    # Killing rg closes its output, which ends the loop even if it never prints a line
+    timer = threading.Timer(_RIPGREP_TIMEOUT, proc.kill)
+    timer.start()
+    matches = []
+    try:
+        for raw in proc.stdout:
+            path, sep, rest = raw.decode('utf-8', errors='replace').partition('\0')
+            line_num, sep2, line = rest.partition(':')
+            if sep and sep2:
+                matches.append(f"{path.removeprefix('./')}:{line_num}: {line.rstrip()}")
+            if len(matches) > _SEARCH_MAX_MATCHES:
+                break
+    finally:
+        timer.cancel()
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+        returncode = proc.wait()
+
+    # Exit status 2 means an error such as a pattern rg's regex engine doesn't support
+    if returncode == 2 and not matches:
+        return None
+    return matches
+
+
+def _scan_file(file_path: Path, cwd: Path, line_matches, literal_bytes: Optional[bytes]) -> list[str]:
+    """Return up to one match past the limit from a single file as 'path:line: text' entries."""
+    try:
+        with open(file_path, 'rb') as f:
+            # Plain text that is absent from the raw bytes can't match any line
+            if literal_bytes is not None:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if mm.find(literal_bytes) == -1:
+                        return []
+
+        file_matches = []
+        rel_path = file_path.relative_to(cwd)
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line_num, line in enumerate(f, 1):
+                if line_matches(line):
+                    file_matches.append(f"{rel_path}:{line_num}: {line.rstrip()}")
+                    if len(file_matches) > _SEARCH_MAX_MATCHES:
+                        break
+        return file_matches
+
+    except (UnicodeDecodeError, OSError, ValueError):
+        # Skip binary files or files that can't be read
+        return []
+
+
 class ToolSearchFiles(Tool):
     """Search for text patterns in files on the host filesystem.
 
@@ -355,65 +800,98 @@ class ToolSearchFiles(Tool):
     pattern: str = Field(description="The text pattern to search for (supports basic regex)")
     file_pattern: Optional[str] = Field(default=None, description="File pattern to limit search (e.g., '*.py' for Python files)")
     directory: str = Field(default=".", description="Directory to search in, relative to project root")
+    max_file_bytes: int = Field(default=16 * 1024 * 1024, description="Skip files larger than this many bytes")
 
     def _run(self) -> str:
         try:
-            import re
 
             # Resolve the directory path
             search_dir = Path(self.directory).resolve()
             cwd = Path.cwd()
 
-            if not str(search_dir).startswith(str(cwd)):
+            if not search_dir.is_relative_to(cwd):
                 return f"Error: Cannot search outside the project directory. Requested: {search_dir}, Project: {cwd}"
 
             if not search_dir.exists() or not search_dir.is_dir():
                 return f"Error: Invalid search directory: {search_dir}"
 
-            matches = []
-
-            # Walk through all files in the directory
-            for file_path in search_dir.rglob('*'):
-                if not file_path.is_file():
-                    continue
-
-                # Check file pattern if specified
-                if self.file_pattern:
-                    try:
-                        import fnmatch
-                        if not fnmatch.fnmatch(file_path.name, self.file_pattern):
-                            continue
-                    except:
-                        # Skip file pattern matching if fnmatch fails
-                        pass
-
+            # Resolve the matcher once for the whole walk; plain text skips the regex engine
+            literal_bytes = None
+            if any(c in _REGEX_METACHARS for c in self.pattern):
                 try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        lines = f.readlines()
-
-                    for line_num, line in enumerate(lines, 1):
-                        if re.search(self.pattern, line):
-                            # Get relative path for cleaner output
-                            rel_path = file_path.relative_to(cwd)
-                            matches.append(f"{rel_path}:{line_num}: {line.rstrip()}")
-
-                except (UnicodeDecodeError, OSError):
-                    # Skip binary files or files that can't be read
-                    continue
+                    line_matches = re.compile(self.pattern).search
+                except re.error as e:
+                    return f"Error: Invalid search pattern '{self.pattern}': {e}"
+            else:
+                literal = self.pattern
+                literal_bytes = literal.encode('utf-8')
+                line_matches = lambda line: literal in line
+
+            # Prefer ripgrep's parallel native walk; the Python walk below is the fallback
+            matches = _ripgrep_search(self.pattern, literal_bytes is not None, self.file_pattern, search_dir, cwd, self.max_file_bytes)
+            if matches is not None:
+                truncated = len(matches) > _SEARCH_MAX_MATCHES
+            else:
+                matches, truncated = self._walk(search_dir, cwd, line_matches, literal_bytes)
 
             if not matches:
                 return f"No matches found for pattern '{self.pattern}' in {search_dir}"
 
             # Limit results to prevent overwhelming output
-            if len(matches) > 50:
-                matches = matches[:50]
-                matches.append(f"... and {len(matches) - 50} more matches (truncated)")
+            if truncated:
+                matches = matches[:_SEARCH_MAX_MATCHES]
+                matches.append(f"... more matches (truncated at {_SEARCH_MAX_MATCHES})")
 
             return f"Search results for '{self.pattern}' in {self.directory}:\n\n" + "\n".join(matches)
 
         except Exception as e:
             return f"Error searching files: {e}"
 
+    def _walk(self, search_dir: Path, cwd: Path, line_matches, literal_bytes: Optional[bytes]) -> tuple[list[str], bool]:
+        """Walk search_dir in Python, returning matches and whether the limit was exceeded."""
+        candidates = []
+
+        # Translate the file pattern once instead of on every fnmatch call
+        name_matches = re.compile(fnmatch.translate(self.file_pattern)).match if self.file_pattern else None
+
+        # Walk through all files in the directory
+        for file_path in search_dir.rglob('*'):
+            if file_path.suffix.lower() in _SEARCH_SKIP_SUFFIXES:
+                continue
+
+            # One stat decides the type and the size; empty and oversized files are never opened
+            try:
+                st = file_path.stat()
+            except OSError:
+                continue
+            if not stat.S_ISREG(st.st_mode) or not 0 < st.st_size <= self.max_file_bytes:
+                continue
+
+            # Check file pattern if specified
+            if name_matches is not None and not name_matches(file_path.name):
+                continue
+
+            candidates.append(file_path)
+
+        def scan(file_path: Path) -> list[str]:
+            return _scan_file(file_path, cwd, line_matches, literal_bytes)
+
+        matches = []
+        truncated = False
+
+        # Reads release the GIL, so files are scanned in parallel; map keeps walk order
+        executor = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4))
+        try:
+            for file_matches in executor.map(scan, candidates):
+                matches.extend(file_matches)
+                if len(matches) > _SEARCH_MAX_MATCHES:
+                    truncated = True
+                    break
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        return matches, truncated
+
     async def __call__(self) -> str:
         return await asyncio.to_thread(self._run)
 
@@ -443,6 +921,7 @@ def create_tool_interact_with_user(
 
 def check_container_status(container_name: str) -> str:
     """Check the status of a Docker container and return diagnostic information."""
+    docker_client = get_docker_client()
     if docker_client is None:
         return "Docker client not available. Please ensure Docker is running."
 
@@ -458,6 +937,7 @@ def check_container_status(container_name: str) -> str:
 
 def check_docker_availability() -> tuple[bool, str]:
     """Check if Docker is available and accessible. Returns (available, message)."""
+    docker_client = get_docker_client()
     if docker_client is None:
         return False, "Docker client not initialized"
 
@@ -468,14 +948,25 @@ def check_docker_availability() -> tuple[bool, str]:
         return False, f"Docker not accessible: {e}"
 
 
+# Longest start_python_dev_container waits for a new container to report running
+_CONTAINER_START_TIMEOUT = 10.0
+
+
 def start_python_dev_container(container_name: str) -> bool:
     """Start a Python development container with project directory mounted. Returns True if successful."""
+    global _git_configured
     print(f"[DEBUG] Starting container '{container_name}'...")
 
+    docker_client = get_docker_client()
     if docker_client is None:
         print("Warning: Docker client not available. Cannot start container.")
         return False
 
+    # The container is about to be replaced, so the shell and handle for the old one are stale
+    _reset_dev_shell()
+    _reset_dev_container()
+    _git_configured = False
+
     try:
         print(f"[DEBUG] Checking for existing container '{container_name}'...")
         # Check if container exists and clean it up
@@ -546,13 +1037,13 @@ CMD ["tail", "-f", "/dev/null"]
         )
         print(f"[DEBUG] Container created with ID: {container.id}")
 
-        # Wait a moment for container to be ready
+        # Poll until the container leaves the created state instead of sleeping a fixed time
         print(f"[DEBUG] Waiting for container to be ready...")
-        import time
-        time.sleep(2)
-
-        # Verify container is running
+        deadline = time.monotonic() + _CONTAINER_START_TIMEOUT
         container.reload()
+        while container.status in ("created", "restarting") and time.monotonic() < deadline:
+            time.sleep(0.05)
+            container.reload()
         print(f"[DEBUG] Container status after reload: {container.status}")
         if container.status == "running":
             print(f"[DEBUG] Container '{container_name}' started successfully")
@@ -579,6 +1070,96 @@ CMD ["tail", "-f", "/dev/null"]
         return False
 
 
+# Files ToolSearchAndReplace never rewrites
+_REPLACE_SKIP_SUFFIXES = frozenset({'.pyc', '.pyo', '.pyd', '.so', '.o', '.png', '.jpg', '.pdf', '.zip'})
+# Directories it skips unless told otherwise: version control and tool caches only.
+# Build output and vendored code can hold files the user means to change, so
+# pruning those is left to the caller through excludes
+_REPLACE_SKIP_DIRS = frozenset({'.git', '.hg', '.svn', '__pycache__', '.mypy_cache', '.pytest_cache'})
+_BINARY_SNIFF_BYTES = 4096
+
+
+@functools.lru_cache(maxsize=32)
+def _compile_excludes(patterns: tuple[str, ...]):
+    """Compile directory name globs into one regex match function, or None if there are none."""
+    if not patterns:
+        return None
+    return re.compile('|'.join(fnmatch.translate(p) for p in patterns)).match
+
+
+def _scandir_files(root, skip_dir=None):
+    """Yield a DirEntry for every regular file under root, without following symlinks.
+
+    A symlinked file is skipped rather than yielded: writing a replacement over it would
+    turn the link into a copy and leave its target unchanged. Directories whose name
+    satisfies skip_dir are pruned without being opened.
+    """
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if skip_dir is None or not skip_dir(entry.name):
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+        except OSError:
+            # Unreadable directories are skipped, as os.walk does
+            continue
+
+
+def _replace_file_atomically(path: str, data: bytes, mode: int):
+    """Write data to a sibling temp file and rename it over path, so readers never see a partial file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.replace-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, stat.S_IMODE(mode))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _replace_in_file(entry: os.DirEntry, pattern_bytes: bytes, replacement_bytes: bytes, max_file_bytes: int) -> bool:
+    """Replace every occurrence of pattern_bytes in a UTF-8 file; returns whether it was rewritten."""
+    try:
+        # DirEntry caches the stat, so the size and later the mode come from one call
+        st = entry.stat()
+        if not 0 < st.st_size <= max_file_bytes:
+            return False
+
+        # Look for the pattern in a read-only mapping first, so files without
+        # a match (the common case) are never copied into memory
+        with open(entry.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # A NUL byte near the start marks a binary file
+            if mm.find(b'\x00', 0, _BINARY_SNIFF_BYTES) != -1:
+                return False
+            if mm.find(pattern_bytes) == -1:
+                return False
+            content = mm[:]
+
+        # Only rewrite UTF-8 text; raises UnicodeDecodeError for binary files
+        content.decode('utf-8')
+
+        # Replace content in one pass; line endings are kept as they are
+        new_content = content.replace(pattern_bytes, replacement_bytes)
+
+        # If modified, write it back
+        if content == new_content:
+            return False
+        _replace_file_atomically(entry.path, new_content, st.st_mode)
+        return True
+
+    except (UnicodeDecodeError, OSError):
+        # Skip binary files or files that can't be read as UTF-8
+        return False
+
+
 class ToolSearchAndReplace(Tool):
     """
     Search and replace a specific pattern in files across the project.
@@ -587,8 +1168,15 @@ class ToolSearchAndReplace(Tool):
     pattern: str = Field(description="The text pattern to search for")
     replacement: str = Field(description="The text to replace the found pattern with")
     directory: str = Field(description="The directory in which to perform the search and replace")
+    max_file_bytes: int = Field(default=16 * 1024 * 1024, description="Skip files larger than this many bytes")
+    excludes: list[str] = Field(
+        default_factory=lambda: sorted(_REPLACE_SKIP_DIRS),
+        description="Glob patterns for directory names to skip; defaults to version control and cache directories. "
+                    "Add e.g. 'node_modules', '.venv', 'dist' or 'build' to leave vendored or generated code alone",
+    )
 
     def _run(self) -> str:
+        docker_client = get_docker_client()
         if docker_client is None:
             return "Error: Docker client not available. Please ensure Docker is running."
 
@@ -598,31 +1186,24 @@ class ToolSearchAndReplace(Tool):
             if not search_path.is_dir():
                 return f"Error: The specified directory '{self.directory}' does not exist."
 
-            # Walk through the directory
-            for root, _, files in os.walk(search_path):
-                for file in files:
-                    file_path = Path(root) / file
-
-                    # Skip files in __pycache__ directories and other binary files
-                    if '__pycache__' in str(file_path) or file_path.suffix in ['.pyc', '.pyo', '.pyd']:
-                        continue
-
-                    try:
-                        # Read file content
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
+            if not self.pattern:
+                return "Error: The search pattern must not be empty."
 
-                        # Replace content
-                        new_content = content.replace(self.pattern, self.replacement)
+            # The pattern is literal, so matching and replacing work on the raw UTF-8 bytes
+            pattern_bytes = self.pattern.encode('utf-8')
+            replacement_bytes = self.replacement.encode('utf-8')
 
-                        # If modified, write it back
-                        if content != new_content:
-                            with open(file_path, 'w', encoding='utf-8') as f:
-                                f.write(new_content)
+            # Walk through the directory, skipping excluded directories and compiled and binary files
+            skip_dir = _compile_excludes(tuple(self.excludes))
+            entries = [
+                entry for entry in _scandir_files(search_path, skip_dir)
+                if os.path.splitext(entry.name)[1] not in _REPLACE_SKIP_SUFFIXES
+            ]
 
-                    except (UnicodeDecodeError, OSError):
-                        # Skip binary files or files that can't be read as UTF-8
-                        continue
+            # File reads and writes release the GIL, so files are processed in parallel
+            with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+                for _ in executor.map(lambda entry: _replace_in_file(entry, pattern_bytes, replacement_bytes, self.max_file_bytes), entries):
+                    pass
 
             return "Search and replace completed successfully."
         except Exception as e:
@@ -639,50 +1220,30 @@ class ToolEditFile(Tool):
     If the file exists, it allows for appending to the file, otherwise creates a new one.
     """
 
+    _primary_repr: ClassVar[Optional[str]] = "file_path"
+
     file_path: str = Field(description="The path to the file to edit")
     content: str = Field(description="The content to append to the file")
 
     def _run(self) -> str:
-        if docker_client is None:
-            return "Error: Docker client not available. Please ensure Docker is running."
-
-        try:
-            # Get the container
-            container = docker_client.containers.get("python-dev")
-        except docker_errors.NotFound:
-            return "Error: Python development container 'python-dev' not found. The container may not have started properly."
-        except Exception as e:
-            return f"Error: Failed to access container: {e}"
-
-        # Check if container is running
-        container.reload()
-        if container.status != "running":
-            return f"Error: Container 'python-dev' is not running (status: {container.status}). Please restart the agent."
-
-        # Use Python to append content
-        import base64
-        encoded_content = base64.b64encode(self.content.encode('utf-8')).decode('utf-8')
-        cmd = f"python3 -c \"import base64; open('{self.file_path}', 'a').write(base64.b64decode('{encoded_content}').decode('utf-8'))\""
+        container, error = _get_dev_container()
+        if error:
+            return error
 
         # Validate that we're not using Windows paths in Linux container
-        if "\\" in cmd:
+        if "\\" in self.file_path:
             return f"Error: File path contains backslashes which are invalid in Linux container: {self.file_path}"
 
         try:
-            # Execute the command
-            exit_code, output = container.exec_run(cmd, stdout=True, stderr=True)
-
-            if isinstance(output, bytes):
-                output_str = output.decode("utf-8")
-            else:
-                output_str = str(output)
-
-            if exit_code == 0:
-                return "File edited successfully"
-            else:
-                return f"Error editing file: Command failed with exit code {exit_code}\n\nFile path: {self.file_path}\nCommand attempted: {cmd}\nError output: {output_str}"
+            # Fetch the current file, append, and put it back, keeping its mode and owner
+            path = _container_path(container, self.file_path)
+            with _container_file_lock(path):
+                existing, info = _get_container_file(container, path)
+                _put_container_file(container, path, existing + self.content.encode('utf-8'), template=info)
+            return "File edited successfully"
         except Exception as e:
-            return f"Error editing file: {e}\n\nFile path: {self.file_path}\nCommand attempted: {cmd}"
+            _forget_dev_container_if_gone(e)
+            return f"Error editing file: {e}\n\nFile path: {self.file_path}"
 
     async def __call__(self) -> str:
         return await asyncio.to_thread(self._run)
@@ -692,34 +1253,90 @@ class ToolEditFile(Tool):
 GIT_USER_NAME = 'BobbyBot'
 GIT_USER_EMAIL = 'bobbybot@example.com'
 
+# Set once the author is configured in the current container; a new container resets it
+_git_configured = False
+# Keeps concurrent callers, from any thread or event loop, from configuring the same container twice
+_git_configure_lock = threading.Lock()
+
+
+def _configure_git_sync():
+    global _git_configured
+    with _git_configure_lock:
+        if _git_configured:
+            return
+        output = _run_in_container_sync(
+            f"git config --global user.name '{GIT_USER_NAME}' && git config --global user.email '{GIT_USER_EMAIL}'"
+        )
+        # git config is silent on success; anything else is an error to retry next time
+        _git_configured = not output.strip()
+
+
 # Function to configure Git user details
 async def configure_git():
-    await ToolRunCommandInDevContainer(command=f"git config --global user.name '{GIT_USER_NAME}'")()
-    await ToolRunCommandInDevContainer(command=f"git config --global user.email '{GIT_USER_EMAIL}'")()
+    if _git_configured:
+        return
+    await asyncio.to_thread(_configure_git_sync)
 
 # Git configuration will be set when needed during tool usage
 
 
+# Largest page prefix WebSearchTool.open_url returns
+_OPEN_URL_MAX_BYTES = 256 * 1024
+
+
 class WebSearchTool:
     """Web search tool for finding information online."""
 
     def __init__(self):
-        pass
+        # Pooled keep-alive session shared with the GitHub/web helpers
+        self._session = http_session
 
     def search(self, query):
-        import requests
-        response = requests.get(f'https://api.example.com/search?q={query}')
+        response = self._session.get(f'https://api.example.com/search?q={query}')
         return response.json()
 
     def open_url(self, url):
-        response = requests.get(url)
-        return {'data': response.text}
+        # Stream the body and keep only a bounded prefix instead of decoding the whole page
+        with self._session.get(url, stream=True, timeout=30) as response:
+            chunk = response.raw.read(_OPEN_URL_MAX_BYTES, decode_content=True)
+            return {'data': chunk.decode(response.encoding or 'utf-8', errors='replace')}
 
 
 # Registering WebSearchTool as a tool
 web_search_tool = WebSearchTool()
 
 
+# The only curl flags the in-process GET fast path accepts; they change nothing it prints
+_CURL_QUIET_FLAGS = frozenset({"-s", "--silent", "-S", "--show-error", "-sS", "-Ss"})
+
+# Keep-alive session for the curl fast path; unlike clients.http_session it has no
+# retry policy, so failures surface as quickly as they would from curl itself.
+# curl doesn't ask for compression by default, so neither does the session
+_curl_session = requests.Session()
+_curl_session.headers["Accept-Encoding"] = "identity"
+
+
+def _parse_simple_curl_get(command: str) -> Optional[str]:
+    """Return the URL of a curl command that is a bare GET, or None.
+
+    Any other flag (headers, redirects, methods, -i/-v output) changes the request or what
+    curl prints, so those commands are left to the curl binary.
+    """
+    try:
+        args = shlex.split(command)
+    except ValueError:
+        return None
+
+    urls = [arg for arg in args if arg not in _CURL_QUIET_FLAGS]
+    if len(urls) != 1:
+        return None
+    url = urls[0]
+    # curl expands {a,b} and [1-3] into several requests
+    if not url.startswith(("http://", "https://")) or any(c in url for c in "{}[]"):
+        return None
+    return url
+
+
 class ToolCurlCommand(Tool):
     """Execute curl commands for testing web APIs, downloading files, or making HTTP requests.
 
@@ -736,52 +1353,126 @@ class ToolCurlCommand(Tool):
     - curl -L -o output.txt http://example.com/file.txt (download with redirects)
     """
 
+    _primary_repr: ClassVar[Optional[str]] = "command"
+
     command: str = Field(description="The complete curl command to execute (without the 'curl' prefix)")
 
-    def _run(self) -> str:
+    async def __call__(self) -> str:
         """Execute the curl command and return the result."""
-        import subprocess
+        # Bare GETs go through the shared keep-alive session instead of forking curl
+        url = _parse_simple_curl_get(self.command)
+        if url is not None:
+            try:
+                response = await asyncio.to_thread(_curl_session.get, url, allow_redirects=False, timeout=30)
+            except requests.RequestException:
+                # Let curl report connection failures in its own words
+                pass
+            else:
+                body = response.content.decode("utf-8", errors="replace")
+                output_lines = ["✅ Curl command executed successfully"]
+                if body.strip():
+                    output_lines.append("STDOUT:")
+                    output_lines.append(body)
+                return "\n".join(output_lines)
 
         try:
-            # Build the full command
-            full_command = f"curl {self.command}"
-
-            # Execute the curl command
-            result = subprocess.run(
-                full_command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30  # 30 second timeout for network requests
+            # Run curl directly with the parsed arguments; the event loop waits on the
+            # child process instead of a worker thread blocking in subprocess.run
+            process = await asyncio.create_subprocess_exec(
+                "curl", *shlex.split(self.command),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
             )
 
+            try:
+                # 30 second timeout for network requests
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=30)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                return "❌ Curl command timed out after 30 seconds"
+
+            stdout = stdout.decode("utf-8", errors="replace")
+            stderr = stderr.decode("utf-8", errors="replace")
+
             # Format the output
             output_lines = []
 
-            if result.returncode == 0:
+            if process.returncode == 0:
                 output_lines.append("✅ Curl command executed successfully")
             else:
-                output_lines.append(f"⚠️  Curl command failed with exit code {result.returncode}")
+                output_lines.append(f"⚠️  Curl command failed with exit code {process.returncode}")
 
-            if result.stdout.strip():
+            if stdout.strip():
                 output_lines.append("STDOUT:")
-                output_lines.append(result.stdout)
+                output_lines.append(stdout)
 
-            if result.stderr.strip():
+            if stderr.strip():
                 output_lines.append("STDERR:")
-                output_lines.append(result.stderr)
+                output_lines.append(stderr)
 
             return "\n".join(output_lines)
 
-        except subprocess.TimeoutExpired:
-            return "❌ Curl command timed out after 30 seconds"
         except FileNotFoundError:
             return "❌ curl command not found. Please ensure curl is installed on the system."
         except Exception as e:
             return f"❌ Error executing curl command: {str(e)}"
 
-    async def __call__(self) -> str:
-        return await asyncio.to_thread(self._run)
+
+# Subagent output is written once this many bytes are pending or this long has passed
+_SUBAGENT_FLUSH_BYTES = 8192
+_SUBAGENT_FLUSH_SECONDS = 0.1
+
+# Console prefixes for subagent output, encoded once
+_SUBAGENT_TEXT_PREFIX = b"[SUBAGENT] "
+_SUBAGENT_TOOL_PREFIX = b"[SUBAGENT TOOL] "
+_SUBAGENT_RESULT_PREFIX = b"[SUBAGENT RESULT] "
+_SUBAGENT_ERROR_PREFIX = b"[SUBAGENT ERROR] "
+
+# Running subagent tasks; holding them here keeps them from being garbage collected mid-run
+_subagent_tasks: set[asyncio.Task] = set()
+
+
+async def shutdown_subagents():
+    """Cancel any subagents still running and wait for them to finish cleaning up."""
+    for task in _subagent_tasks:
+        task.cancel()
+    await asyncio.gather(*_subagent_tasks, return_exceptions=True)
+
+
+# Events the subagent may run ahead of the console before it has to wait
+_SUBAGENT_QUEUE_SIZE = 256
+
+# A partial line longer than this is printed without waiting for its line break
+_SUBAGENT_MAX_PARTIAL_LINE = 8192
+
+
+async def _subagent_prompter(query: str) -> str:
+    """Answer a subagent's clarification request; it is handed back as text for the main agent."""
+    # TODO: Implement proper inter-agent communication
+    return f"[SUBAGENT REQUESTS CLARIFICATION] {query}"
+
+
+# Subagents get the same tools as the main agent, with questions routed back to it;
+# the list is the same for every spawn, so it is built once
+_SUBAGENT_TOOLS = (
+    ToolRunCommandInDevContainer,
+    ToolUpsertFile,
+    ToolReadFile,
+    ToolListDirectory,
+    ToolSearchFiles,
+    ToolGitStatus,
+    ToolGitBranch,
+    ToolGitCreateBranch,
+    ToolGitAddFiles,
+    ToolGitCommit,
+    ToolGitPushBranch,
+    ToolEditFile,
+    ToolSearchAndReplace,
+    ToolTmuxCommand,
+    ToolCurlCommand,
+    create_tool_interact_with_user(_subagent_prompter),
+)
 
 
 class ToolSpawnSubagent(Tool):
@@ -801,74 +1492,16 @@ class ToolSpawnSubagent(Tool):
         try:
             # Import here to avoid circular imports
             from agent import Agent
-            import asyncio
-            from datetime import datetime
+            from simple_ui_prompts import SUBAGENT_PROMPT_TEMPLATE
 
             # Create a focused system prompt for the subagent
-            subagent_prompt = f"""You are a specialized subagent tasked with: {self.task}
-
-Complete this task efficiently using the available tools. Focus only on the assigned task and provide clear, actionable results.
-
-Available tools include:
-- File operations (read, write, edit files)
-- Directory listing and file search
-- Command execution in development container
-- Git operations (status, branch management, commits)
-- User interaction for clarification
-
-Work step-by-step and use tools as needed to complete the task successfully."""
-
-            # Create subagent with all available tools (same as main agent)
-            from simple_ui import (
-                ToolRunCommandInDevContainer,
-                ToolUpsertFile,
-                ToolReadFile,
-                ToolListDirectory,
-                ToolSearchFiles,
-                ToolGitStatus,
-                ToolGitBranch,
-                ToolGitCreateBranch,
-                ToolGitAddFiles,
-                ToolGitCommit,
-                ToolGitPushBranch,
-                ToolEditFile,
-                ToolSearchAndReplace,
-                ToolTmuxCommand,
-                ToolCurlCommand,
-            )
-
-            # Create a user interaction tool that forwards to main agent
-            def subagent_prompter(query: str) -> str:
-                # For now, return a message that will be handled by the main agent
-                # TODO: Implement proper inter-agent communication
-                return f"[SUBAGENT REQUESTS CLARIFICATION] {query}"
-
-            ToolInteractWithUser = create_tool_interact_with_user(subagent_prompter)
-
-            subagent_tools = [
-                ToolRunCommandInDevContainer,
-                ToolUpsertFile,
-                ToolReadFile,
-                ToolListDirectory,
-                ToolSearchFiles,
-                ToolGitStatus,
-                ToolGitBranch,
-                ToolGitCreateBranch,
-                ToolGitAddFiles,
-                ToolGitCommit,
-                ToolGitPushBranch,
-                ToolEditFile,
-                ToolSearchAndReplace,
-                ToolTmuxCommand,
-                ToolCurlCommand,
-                ToolInteractWithUser
-            ]
+            subagent_prompt = SUBAGENT_PROMPT_TEMPLATE.format(task=self.task)
 
-            # Create subagent instance
+            # Create subagent instance with all available tools (same as main agent)
             subagent = Agent(
                 system_prompt=subagent_prompt,
                 model="gpt-4o-mini",
-                tools=subagent_tools,
+                tools=list(_SUBAGENT_TOOLS),
                 messages=[]
             )
 
@@ -888,78 +1521,107 @@ Work step-by-step and use tools as needed to complete the task successfully."""
                             f.write(f"{prefix} {timestamp} {line}\n")
                     except Exception:
                         pass
+                # Subagent output is collected as bytes and written in batches rather than
+                # one flushed print per line
+                stdout = sys.stdout
+                encoding = stdout.encoding or "utf-8"
+                out_buf = bytearray()
+                last_flush = time.monotonic()
+
+                def flush_output():
+                    nonlocal last_flush
+                    if out_buf:
+                        # Anything already queued on the text layer goes out first
+                        stdout.flush()
+                        stdout.buffer.write(out_buf)
+                        stdout.buffer.flush()
+                        out_buf.clear()
+                    last_flush = time.monotonic()
+
+                def emit(prefix: bytes, text: str):
+                    # Characters the console can't encode are replaced rather than raising
+                    out_buf.extend(prefix)
+                    out_buf.extend(text.encode(encoding, "replace"))
+                    out_buf.extend(b"\n")
+                    if len(out_buf) > _SUBAGENT_FLUSH_BYTES or time.monotonic() - last_flush > _SUBAGENT_FLUSH_SECONDS:
+                        flush_output()
+
+                # The agent loop feeds a bounded queue, so a chatty subagent waits for the
+                # console instead of piling up events; None marks the end of the stream
+                queue: asyncio.Queue = asyncio.Queue(maxsize=_SUBAGENT_QUEUE_SIZE)
+
+                async def produce_events():
+                    try:
+                        async for event in subagent.agentic_loop(emit_input_json=False):
+                            await queue.put(event)
+                    finally:
+                        await queue.put(None)
+
+                producer = asyncio.create_task(produce_events())
+
                 try:
+                    from agent import EventText, EventToolUse, EventToolResult
                     append_log("started")
                     text_buffer = ""
-                    async for event in subagent.agentic_loop():
-                        from agent import EventText, EventToolUse, EventToolResult
+                    while (event := await queue.get()) is not None:
                         if isinstance(event, EventText):
-                            text_buffer += event.text
-                            # Print complete lines or when buffer gets too large
-                            if '\n' in text_buffer or len(text_buffer) > 100:
-                                lines = text_buffer.split('\n')
-                                for line in lines[:-1]:  # Print complete lines
+                            # Only the new text is scanned for line breaks; text_buffer holds
+                            # the incomplete line carried over from earlier events
+                            newline = event.text.rfind('\n')
+                            if newline == -1:
+                                text_buffer += event.text
+                                if len(text_buffer) > _SUBAGENT_MAX_PARTIAL_LINE:
+                                    emit(_SUBAGENT_TEXT_PREFIX, text_buffer)
+                                    append_log(text_buffer)
+                                    text_buffer = ""
+                            else:
+                                lines = (text_buffer + event.text[:newline]).split('\n')
+                                for line in lines:  # Print complete lines
                                     if line.strip():
-                                        try:
-                                            print(f"[SUBAGENT] {line}", flush=True)
-                                            append_log(line)
-                                        except UnicodeEncodeError:
-                                            # Handle encoding issues by replacing problematic characters
-                                            safe_line = line.encode('ascii', 'replace').decode('ascii')
-                                            print(f"[SUBAGENT] {safe_line}", flush=True)
-                                            append_log(safe_line)
-                                text_buffer = lines[-1]  # Keep incomplete line
+                                        emit(_SUBAGENT_TEXT_PREFIX, line)
+                                        append_log(line)
+                                text_buffer = event.text[newline + 1:]  # Keep incomplete line
                         elif isinstance(event, EventToolUse):
                             # Flush any buffered text first
                             if text_buffer.strip():
-                                try:
-                                    print(f"[SUBAGENT] {text_buffer}", flush=True)
-                                    append_log(text_buffer)
-                                except UnicodeEncodeError:
-                                    safe_text = text_buffer.encode('ascii', 'replace').decode('ascii')
-                                    print(f"[SUBAGENT] {safe_text}", flush=True)
-                                    append_log(safe_text)
+                                emit(_SUBAGENT_TEXT_PREFIX, text_buffer)
+                                append_log(text_buffer)
                                 text_buffer = ""
-                            print(f"[SUBAGENT TOOL] {event.tool.__class__.__name__}", flush=True)
+                            emit(_SUBAGENT_TOOL_PREFIX, event.tool.__class__.__name__)
                             append_log(f"[TOOL] {event.tool.__class__.__name__}")
+                            # A tool call is a natural pause, so show everything so far
+                            flush_output()
                         elif isinstance(event, EventToolResult):
                             # Flush any buffered text first
                             if text_buffer.strip():
-                                try:
-                                    print(f"[SUBAGENT] {text_buffer}", flush=True)
-                                    append_log(text_buffer)
-                                except UnicodeEncodeError:
-                                    safe_text = text_buffer.encode('ascii', 'replace').decode('ascii')
-                                    print(f"[SUBAGENT] {safe_text}", flush=True)
-                                    append_log(safe_text)
+                                emit(_SUBAGENT_TEXT_PREFIX, text_buffer)
+                                append_log(text_buffer)
                                 text_buffer = ""
-                            result_preview = event.result[:100] + "..." if len(event.result) > 100 else event.result
-                            try:
-                                print(f"[SUBAGENT RESULT] {result_preview}", flush=True)
-                                append_log(f"[RESULT] {result_preview}")
-                            except UnicodeEncodeError:
-                                safe_result = result_preview.encode('ascii', 'replace').decode('ascii')
-                                print(f"[SUBAGENT RESULT] {safe_result}", flush=True)
-                                append_log(f"[RESULT] {safe_result}")
+                            result_preview = truncate(event.result)
+                            emit(_SUBAGENT_RESULT_PREFIX, result_preview)
+                            append_log(f"[RESULT] {result_preview}")
+
+                    # Surface any error the agent loop raised
+                    await producer
 
                     # Flush any remaining buffered text
                     if text_buffer.strip():
-                        try:
-                            print(f"[SUBAGENT] {text_buffer}", flush=True)
-                            append_log(text_buffer)
-                        except UnicodeEncodeError:
-                            safe_text = text_buffer.encode('ascii', 'replace').decode('ascii')
-                            print(f"[SUBAGENT] {safe_text}", flush=True)
-                            append_log(safe_text)
-
-                    print("[SUBAGENT] Task completed successfully.", flush=True)
+                        emit(_SUBAGENT_TEXT_PREFIX, text_buffer)
+                        append_log(text_buffer)
+
+                    emit(_SUBAGENT_TEXT_PREFIX, "Task completed successfully.")
                     append_log("completed successfully")
                 except Exception as e:
-                    print(f"[SUBAGENT ERROR] {str(e)}", flush=True)
+                    emit(_SUBAGENT_ERROR_PREFIX, str(e))
                     append_log(f"error: {str(e)}")
+                finally:
+                    producer.cancel()
+                    flush_output()
 
             # Create background task for subagent
-            asyncio.create_task(run_subagent())
+            task = asyncio.create_task(run_subagent(), name=f"subagent:{self.task[:40]}")
+            _subagent_tasks.add(task)
+            task.add_done_callback(_subagent_tasks.discard)
 
             # Return immediately so main thread isn't blocked
             return f"Subagent started for task: {self.task[:100]}{'...' if len(self.task) > 100 else ''}. It will run in the background and output will be prefixed with [SUBAGENT]."
@@ -967,7 +1629,6 @@ Work step-by-step and use tools as needed to complete the task successfully."""
         except Exception as e:
             return f"Error spawning subagent: {str(e)}"
 def create_pr(repo, title, body='', head='', base='main'):
-    import requests
     url = f'https://api.github.com/repos/{repo}/pulls'
     headers = {'Authorization': f'token YOUR_ACTUAL_GITHUB_TOKEN'}
     data = {'title': title, 'body': body, 'head': head, 'base': base}
@@ -976,7 +1637,6 @@ def create_pr(repo, title, body='', head='', base='main'):
 
 
 def list_issues(repo):
-    import requests
     url = f'https://api.github.com/repos/{repo}/issues'
     headers = {'Authorization': f'token YOUR_ACTUAL_GITHUB_TOKEN'}
     response = requests.get(url, headers=headers)
@@ -984,7 +1644,6 @@ def list_issues(repo):
 
 
 def create_issue(repo, title, body='', labels=[]):
-    import requests
     url = f'https://api.github.com/repos/{repo}/issues'
     headers = {'Authorization': f'token YOUR_ACTUAL_GITHUB_TOKEN'}
     data = {'title': title, 'body': body, 'labels': labels}
@@ -993,7 +1652,6 @@ def create_issue(repo, title, body='', labels=[]):
 
 
 def update_issue(repo, issue_number, title=None, body=None, state=None):
-    import requests
     url = f'https://api.github.com/repos/{repo}/issues/{issue_number}'
     headers = {'Authorization': f'token YOUR_ACTUAL_GITHUB_TOKEN'}
     data = {}
@@ -1006,8 +1664,6 @@ def update_issue(repo, issue_number, title=None, body=None, state=None):
     response = requests.patch(url, json=data, headers=headers)
     return response.json()
 def create_pull_request(repo_name, title, body, head, base='main', reviewers=None):
-    import requests
-    import os
 
     # GitHub personal access token
     token = os.getenv('GH_PAT')
@@ -1038,8 +1694,6 @@ def create_pull_request(repo_name, title, body, head, base='main', reviewers=Non
 
 
 def list_repos(username):
-    import requests
-    import os
 
     # GitHub personal access token
     token = os.getenv('GH_PAT')
@@ -1051,8 +1705,6 @@ def list_repos(username):
 
 
 def test_github_authentication():
-    import os
-    import requests
 
     # GitHub personal access token
     token = os.getenv('GH_PAT')
@@ -1149,15 +1801,12 @@ def implement_command(md_file):
     # Supported executable step forms:
     #   - run: <shell command>        -> executed inside python-dev container
     #   - write:<path>|<content>      -> write content to a file on host
-    from datetime import datetime
     results: list[str] = []
     needs_clarification: list[str] = []
 
     # Heuristics to treat natural steps as executable without requiring 'run:' or 'write:'
     # - If a step starts with a common shell command, run it
     # - If a step looks like "create/write file <path>: <content>" or "<path> | <content>", write it
-    import re
-
     shell_starters = {
         "git", "docker", "python", "pip", "pytest", "bash", "sh", "npm", "pnpm", "yarn",
         "uvicorn", "flask", "make", "curl", "echo", "tmux", "poetry"
@@ -1204,7 +1853,7 @@ def implement_command(md_file):
             command = step.split(":", 1)[1].strip()
             # Execute inside dev container synchronously
             try:
-                output = ToolRunCommandInDevContainer(command=command)._run()
+                output = _run_in_container_sync(command)
                 results.append(f"{step_header}\nResult:\n{output.strip()}\n")
             except Exception as e:
                 results.append(f"{step_header}\nError executing command: {e}\n")
@@ -1229,7 +1878,7 @@ def implement_command(md_file):
         # Heuristic: execute shell-like commands even without 'run:' prefix
         if _is_shell_like_command(step):
             try:
-                output = ToolRunCommandInDevContainer(command=step.strip())._run()
+                output = _run_in_container_sync(step.strip())
                 results.append(f"{step_header}\nResult:\n{output.strip()}\n")
             except Exception as e:
                 results.append(f"{step_header}\nError executing inferred command: {e}\n")
@@ -6,4 +6,9 @@ def setup_logging() -> logging.Logger:
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     )
     logger = logging.getLogger(__name__)
-    return logger
\ No newline at end of file
+    return logger
+
+
+def truncate(text: str, limit: int = 100, ellipsis: str = "...") -> str:
+    """Shorten text to limit characters, marking the cut with an ellipsis."""
+    return text if len(text) <= limit else text[:limit] + ellipsis
@@ -1,27 +1,140 @@
-from flask import Flask, request, jsonify
-import requests
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional
 
-app = Flask(__name__)
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
 
-@app.route('/search', methods=['GET'])
-def search():
-    query = request.args.get('query')
+# One pooled HTTP/2 client for the whole process, so concurrent fetches share connections
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with httpx.AsyncClient(http2=True, limits=HTTP_LIMITS, timeout=30, follow_redirects=True) as client:
+        app.state.client = client
+        yield
+
+
+# orjson encodes large page bodies much faster than the stdlib json module
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+
+# Largest page body /open_url reads; anything beyond it is cut off
+OPEN_URL_MAX_BYTES = 10 * 1024 * 1024
+
+# Pages that came with an ETag, keyed by URL as (etag, fetched_at, text); least recently used first.
+# The cache is bounded by the total length of the cached text, and pages longer than
+# OPEN_URL_CACHE_MAX_PAGE_CHARS are never cached, so a few huge pages can't pin it
+OPEN_URL_CACHE_MAX_CHARS = 64 * 1024 * 1024
+OPEN_URL_CACHE_MAX_PAGE_CHARS = 1024 * 1024
+_url_cache: OrderedDict[str, tuple[str, float, str]] = OrderedDict()
+_url_cache_chars = 0
+
+
+def _cache_page(url: str, etag: str, text: str):
+    """Cache a page, evicting the least recently used ones to stay within OPEN_URL_CACHE_MAX_CHARS."""
+    global _url_cache_chars
+    _forget_page(url)
+    if len(text) > OPEN_URL_CACHE_MAX_PAGE_CHARS:
+        return
+    _url_cache[url] = (etag, time.monotonic(), text)
+    _url_cache_chars += len(text)
+    while _url_cache_chars > OPEN_URL_CACHE_MAX_CHARS:
+        _, (_, _, evicted) = _url_cache.popitem(last=False)
+        _url_cache_chars -= len(evicted)
+
+
+def _forget_page(url: str):
+    """Drop a page from the cache, if it is there."""
+    global _url_cache_chars
+    cached = _url_cache.pop(url, None)
+    if cached is not None:
+        _url_cache_chars -= len(cached[2])
+
+
+async def _fetch_text(url: str, max_age: float = 0) -> str:
+    """Fetch url and return its body as text, reading at most OPEN_URL_MAX_BYTES.
+
+    A cached page younger than max_age seconds is returned as is; an older one is
+    revalidated with If-None-Match, so an unchanged page costs no body bytes.
+    """
+    headers = {}
+    cached = _url_cache.get(url)
+    if cached is not None:
+        _url_cache.move_to_end(url)
+        etag, fetched_at, text = cached
+        if time.monotonic() - fetched_at < max_age:
+            return text
+        headers['If-None-Match'] = etag
+
+    # Stream the body so a huge page never has to be buffered whole
+    async with app.state.client.stream('GET', url, headers=headers) as response:
+        if cached is not None and response.status_code == 304:
+            _cache_page(url, etag, text)
+            return text
+
+        body = bytearray()
+        async for chunk in response.aiter_bytes(65536):
+            body += chunk
+            if len(body) >= OPEN_URL_MAX_BYTES:
+                del body[OPEN_URL_MAX_BYTES:]
+                break
+        # Decode once at the end; a character split by the cap becomes a replacement mark
+        text = body.decode(response.encoding or 'utf-8', errors='replace')
+
+    etag = response.headers.get('ETag')
+    if response.status_code == 200 and etag:
+        _cache_page(url, etag, text)
+    else:
+        _forget_page(url)
+    return text
+
+
+@app.get('/search')
+async def search(query: Optional[str] = None):
     # This is a placeholder response; actual implementation would involve calling a search API
     results = [
         {'title': 'Example Result 1', 'url': 'https://example.com/1'},
         {'title': 'Example Result 2', 'url': 'https://example.com/2'}
     ]
-    return jsonify(results)
+    return results
 
-@app.route('/open_url', methods=['GET'])
-def open_url():
-    url = request.args.get('url')
+@app.get('/open_url')
+async def open_url(url: str, max_age: float = 0):
     try:
-        response = requests.get(url)
-        content = response.text  # Sanitize content before returning
-        return jsonify({'content': content})
-    except requests.RequestException:
-        return jsonify({'error': 'Failed to fetch URL.'}), 400
+        # Awaiting the fetch lets other requests run on the event loop meanwhile
+        content = await _fetch_text(url, max_age)  # Sanitize content before returning
+        return {'content': content}
+    except (httpx.HTTPError, httpx.InvalidURL):
+        return ORJSONResponse({'error': 'Failed to fetch URL.'}, status_code=400)
+
+# Upper bound on fetches one /open_urls call runs at the same time
+OPEN_URLS_CONCURRENCY = 32
+
+
+class OpenUrlsRequest(BaseModel):
+    urls: list[str]
+
+
+async def _fetch_content(url: str, semaphore: asyncio.Semaphore) -> dict:
+    async with semaphore:
+        try:
+            return {'content': await _fetch_text(url)}
+        except (httpx.HTTPError, httpx.InvalidURL):
+            return {'error': 'Failed to fetch URL.'}
+
+
+@app.post('/open_urls')
+async def open_urls(body: OpenUrlsRequest):
+    # Fetch all URLs concurrently; results are aligned with the request by index
+    semaphore = asyncio.Semaphore(OPEN_URLS_CONCURRENCY)
+    return await asyncio.gather(*(_fetch_content(url, semaphore) for url in body.urls))
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8000)
\ No newline at end of file
+    # libuv-based loop for the fetch fan-out; the service image is Linux-only
+    uvicorn.run(app, host='0.0.0.0', port=8000, loop='uvloop')
\ No newline at end of file
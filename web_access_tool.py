@@ -1,12 +1,54 @@
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) timeouts in seconds for calls to the web access service
+REQUEST_TIMEOUT = (3, 30)
 
 class WebAccessTool:
     def __init__(self, base_url: str):
         self.base_url = base_url
+        # One pooled keep-alive session, so repeat calls to base_url skip the TCP/TLS handshake
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=50,
+            max_retries=Retry(total=2, backoff_factor=0.1),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._async_client = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+
+    async def aclose(self):
+        """Close the async client's pooled connections, if it was used."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        # Created on first use so it binds to the event loop that awaits it
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=10),
+                timeout=httpx.Timeout(REQUEST_TIMEOUT[1], connect=REQUEST_TIMEOUT[0]),
+            )
+        return self._async_client
 
     def search(self, query: str):
         """Search for a query using the web access service."""
-        response = requests.get(f"{self.base_url}/search", params={"query": query})
+        response = self.session.get(f"{self.base_url}/search", params={"query": query}, timeout=REQUEST_TIMEOUT)
         if response.status_code == 200:
             return response.json()
         else:
@@ -14,8 +56,37 @@ class WebAccessTool:
 
     def open_url(self, url: str):
         """Fetch and sanitize content from a given URL."""
-        response = requests.get(f"{self.base_url}/open_url", params={"url": url})
+        response = self.session.get(f"{self.base_url}/open_url", params={"url": url}, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 200:
+            return response.json()
+        else:
+            response.raise_for_status()
+
+    def open_urls(self, urls: list[str]):
+        """Fetch several URLs in one call; the service fetches them concurrently.
+
+        Returns one result per URL, in order: {'content': ...} or {'error': ...}.
+        """
+        response = self.session.post(f"{self.base_url}/open_urls", json={"urls": urls}, timeout=REQUEST_TIMEOUT)
         if response.status_code == 200:
             return response.json()
         else:
-            response.raise_for_status()
\ No newline at end of file
+            response.raise_for_status()
+
+    async def search_async(self, query: str):
+        """Search for a query using the web access service without blocking the event loop."""
+        response = await self._get_async_client().get("/search", params={"query": query})
+        response.raise_for_status()
+        return response.json()
+
+    async def open_url_async(self, url: str):
+        """Fetch and sanitize content from a given URL without blocking the event loop."""
+        response = await self._get_async_client().get("/open_url", params={"url": url})
+        response.raise_for_status()
+        return response.json()
+
+    async def open_urls_async(self, urls: list[str]):
+        """Fetch several URLs in one call without blocking the event loop."""
+        response = await self._get_async_client().post("/open_urls", json={"urls": urls})
+        response.raise_for_status()
+        return response.json()
\ No newline at end of file